@@ -12,6 +12,13 @@ from scipy.stats import pearsonr
 
 df = pd.read_csv("results/cumulative_res.csv")
 
+# runtime of the diagnosis itself (state machine), if available, otherwise the overall runtime per instance
+# (results of previous versions without phase-level measurements)
+if "max_smach_runtime (s)" in df.columns and df["max_smach_runtime (s)"].notna().all():
+    MAX_RUNTIME = "max_smach_runtime (s)"
+else:
+    MAX_RUNTIME = "max_runtime (s)"
+
 NUM_COMP = 129
 anomaly_percentages = [float(i.split("_")[1]) for i in df["instance_set"]]
 affected_by_percentages = [float(i.split("_")[2]) for i in df["instance_set"]]
@@ -405,12 +412,12 @@ print("\tcorr. coeff.:", corr_coeff, "p-val:", p_val, "significant:", significan
 
 print("-------------------------------------------------------------------------------------------")
 
-corr_coeff, p_val, significant = determine_correlation(sum_of_max_fault_paths_and_dev, df["max_runtime (s)"])
-print("sum_of_max_fault_paths_and_dev --- max_runtime:")
+corr_coeff, p_val, significant = determine_correlation(sum_of_max_fault_paths_and_dev, df[MAX_RUNTIME])
+print("sum_of_max_fault_paths_and_dev ---", MAX_RUNTIME + ":")
 print("\tcorr. coeff.:", corr_coeff, "p-val:", p_val, "significant:", significant)
 
-corr_coeff, p_val, significant = determine_correlation(sum_of_avg_fault_paths_and_dev, df["max_runtime (s)"])
-print("sum_of_avg_fault_paths_and_dev --- max_runtime:")
+corr_coeff, p_val, significant = determine_correlation(sum_of_avg_fault_paths_and_dev, df[MAX_RUNTIME])
+print("sum_of_avg_fault_paths_and_dev ---", MAX_RUNTIME + ":")
 print("\tcorr. coeff.:", corr_coeff, "p-val:", p_val, "significant:", significant)
 
 corr_coeff, p_val, significant = determine_correlation(df["avg_num_fault_paths"], df["avg_fault_path_len"])
@@ -6,6 +6,7 @@ import argparse
 import csv
 import glob
 import os
+from typing import Tuple
 
 import pandas as pd
 
@@ -18,7 +19,10 @@ def write_instance_set_res_to_csv(
         filename: str, avg_runtime: float, avg_classification_ratio: float, avg_ratio_of_found_gtfp: float,
         diag_success_percentage: float, median_runtime: float, median_num_fault_paths: float,
         median_fault_path_len: float, max_runtime: float, avg_compensation_by_aff_by_savior: float,
-        avg_missed_chances: float, avg_no_second_chance: float, fp_dev_min: float, avg_ratio_found_anomalies: float
+        avg_missed_chances: float, avg_no_second_chance: float, fp_dev_min: float, avg_ratio_found_anomalies: float,
+        avg_kg_clear_runtime: float, avg_kg_upload_runtime: float, avg_smach_runtime: float,
+        median_smach_runtime: float, max_smach_runtime: float, avg_comparison_runtime: float, avg_cpu_time: float,
+        max_peak_rss: float, num_of_censored: int, runtime_lower_bound: bool
 ) -> None:
     """
     Writes the results for the specified instance set to csv file.
@@ -57,6 +61,16 @@ def write_instance_set_res_to_csv(
     :param avg_no_second_chance: average 'no second chance' cases
     :param fp_dev_min: minimum fault path deviations
     :param avg_ratio_found_anomalies: average ratio of found anomalies
+    :param avg_kg_clear_runtime: average runtime of clearing the KG
+    :param avg_kg_upload_runtime: average runtime of loading the instance KGs
+    :param avg_smach_runtime: average runtime of the diagnosis state machine
+    :param median_smach_runtime: median runtime of the diagnosis state machine
+    :param max_smach_runtime: maximum runtime of the diagnosis state machine
+    :param avg_comparison_runtime: average runtime of the comparison with the ground truth
+    :param avg_cpu_time: average CPU time
+    :param max_peak_rss: maximum peak RSS (MB)
+    :param num_of_censored: number of censored instances (diagnosis aborted due to its budget, included)
+    :param runtime_lower_bound: whether the runtimes are lower bounds (censored runtimes)
     """
     file_exists = os.path.isfile(filename)
     with open(filename, mode='a', newline='') as csv_file:
@@ -69,7 +83,10 @@ def write_instance_set_res_to_csv(
                  "avg_fault_path_len", "max_fault_path_len", "avg_runtime (s)", "avg_classification_ratio",
                  "diag_success_percentage", "median_runtime (s)", "median_num_fault_paths", "median_fault_path_len",
                  "max_runtime (s)", "avg_compensation_by_aff_by_savior", "avg_missed_chances", "avg_no_second_chance",
-                 "fp_dev_min", "avg_ratio_found_anomalies"]
+                 "fp_dev_min", "avg_ratio_found_anomalies", "avg_kg_clear_runtime (s)", "avg_kg_upload_runtime (s)",
+                 "avg_smach_runtime (s)", "median_smach_runtime (s)", "max_smach_runtime (s)",
+                 "avg_comparison_runtime (s)", "avg_cpu_time (s)", "max_peak_rss (MB)", "num_censored",
+                 "runtime_lower_bound"]
             )
         instance_set_sol = instance_set_sol.split("/")[1].replace(".csv", "")
         writer.writerow(
@@ -78,10 +95,25 @@ def write_instance_set_res_to_csv(
              avg_ratio_of_found_gtfp, avg_num_fault_paths, max_num_fault_paths, avg_fault_path_len, max_fault_path_len,
              avg_runtime, avg_classification_ratio, diag_success_percentage, median_runtime, median_num_fault_paths,
              median_fault_path_len, max_runtime, avg_compensation_by_aff_by_savior, avg_missed_chances,
-             avg_no_second_chance, fp_dev_min, avg_ratio_found_anomalies]
+             avg_no_second_chance, fp_dev_min, avg_ratio_found_anomalies, avg_kg_clear_runtime, avg_kg_upload_runtime,
+             avg_smach_runtime, median_smach_runtime, max_smach_runtime, avg_comparison_runtime, avg_cpu_time,
+             max_peak_rss, num_of_censored, runtime_lower_bound]
         )
 
 
+def describe_phase(df: pd.DataFrame, column: str) -> Tuple[float, float, float]:
+    """
+    Describes the phase-level measurements (cf. `eval.py`) of the instance set.
+
+    :param df: instance-level results of the instance set
+    :param column: column of the phase
+    :return: (mean, median, max) -- NaN for results without phase-level measurements (previous versions)
+    """
+    if column not in df.columns:
+        return float("nan"), float("nan"), float("nan")
+    return round(df[column].mean(), 3), round(df[column].median(), 3), round(df[column].max(), 3)
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Analyze results and generate cumulated results file.')
     parser.add_argument('--instance-set-sol', type=str, required=True)
@@ -91,6 +123,16 @@ if __name__ == '__main__':
     for instance_set_sol in glob.glob(args.instance_set_sol + "/*.csv"):
         print("working on instance set:", instance_set_sol)
         df = pd.read_csv(instance_set_sol)
+        # censored results (diagnosis aborted due to its budget, cf. `eval.py`) are part of the instance set: they
+        # count as diagnosis failures (and mismatches), their runtimes (until the abortion) are lower bounds, and their
+        # ground truth fault paths are known, all other measures are NaN, i.e., only based on the completed instances
+        completed = pd.Series(True, index=df.index)
+        if "status" in df.columns:
+            completed = df["status"].fillna("ok") == "ok"  # results of previous versions
+        num_of_censored = int((~completed).sum())
+        runtime_lower_bound = num_of_censored > 0
+        if not completed.any():
+            print("\tno completed results (" + str(num_of_censored) + " censored)")
         num_of_instances = df.count()["instance"]
         avg_tp = round(df["TP"].describe()["mean"], 2)
         avg_tn = round(df["TN"].describe()["mean"], 2)
@@ -107,13 +149,11 @@ if __name__ == '__main__':
         avg_ano_link_percentage = round(df["ano_link_perc"].describe()["mean"], 2)
         avg_model_acc = round(df["avg_model_acc"].describe()["mean"], 2)
 
-        top_class_gt_match = df["gt_match"].describe()["top"]
-        top_freq_gt_match = df["gt_match"].describe()["freq"]
-        gt_match_percentage = top_freq_gt_match if top_class_gt_match else 100 - top_freq_gt_match
+        num_of_gt_matches = (df.loc[completed, "gt_match"].astype(str) == "True").sum()
+        gt_match_percentage = round(100.0 * num_of_gt_matches / num_of_instances, 2)
 
-        top_class_diag_success = df["diag_success"].describe()["top"]
-        top_freq_diag_success = df["diag_success"].describe()["freq"]
-        diag_success_percentage = top_freq_diag_success if top_class_diag_success else 100 - top_freq_diag_success
+        num_of_diag_successes = (df.loc[completed, "diag_success"].astype(str) == "True").sum()
+        diag_success_percentage = round(100.0 * num_of_diag_successes / num_of_instances, 2)
 
         avg_num_fault_paths = round(df["#fault_paths"].describe()["mean"], 2)
         median_num_fault_paths = round(df["#fault_paths"].median(), 2)
@@ -126,6 +166,13 @@ if __name__ == '__main__':
         median_runtime = round(df["runtime (s)"].median(), 2)
         max_runtime = round(df["runtime (s)"].describe()["max"], 2)
 
+        avg_kg_clear_runtime = describe_phase(df, "kg_clear (s)")[0]
+        avg_kg_upload_runtime = describe_phase(df, "kg_upload (s)")[0]
+        avg_smach_runtime, median_smach_runtime, max_smach_runtime = describe_phase(df, "smach (s)")
+        avg_comparison_runtime = describe_phase(df, "comparison (s)")[0]
+        avg_cpu_time = describe_phase(df, "cpu_time (s)")[0]
+        max_peak_rss = describe_phase(df, "peak_rss (MB)")[2]
+
         avg_classification_ratio = round(df["classification_ratio"].describe()["mean"], 2)
         avg_ratio_of_found_gtfp = round(df["ratio_of_found_gtfp"].describe()["mean"], 2)
 
@@ -145,5 +192,7 @@ if __name__ == '__main__':
             avg_num_fault_paths, max_num_fault_paths, avg_fault_path_len, max_fault_path_len, filename, avg_runtime,
             avg_classification_ratio, avg_ratio_of_found_gtfp, diag_success_percentage, median_runtime,
             median_num_fault_paths, median_fault_path_len, max_runtime, avg_compensation_by_aff_by_savior,
-            avg_missed_chances, avg_no_second_chance, fp_dev_min, avg_ratio_found_anomalies
+            avg_missed_chances, avg_no_second_chance, fp_dev_min, avg_ratio_found_anomalies, avg_kg_clear_runtime,
+            avg_kg_upload_runtime, avg_smach_runtime, median_smach_runtime, max_smach_runtime, avg_comparison_runtime,
+            avg_cpu_time, max_peak_rss, num_of_censored, runtime_lower_bound
         )
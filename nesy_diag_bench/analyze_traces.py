@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import glob
+import os
+import tempfile
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def load_trace(trace_file: str) -> Dict[str, np.ndarray]:
+    """
+    Loads the state transition trace of an instance (cf. `LocalDataProvider.dump_trace()`).
+
+    :param trace_file: trace file
+    :return: columns of the trace
+    """
+    with np.load(trace_file) as trace:
+        return {key: trace[key] for key in trace.files}
+
+
+def get_state_durations(trace: Dict[str, np.ndarray]) -> Tuple[List[str], np.ndarray]:
+    """
+    Determines the time spent in the states of the trace: each transition ends the stay in its previous state, which
+    began with the preceding transition (or the start of the trace), and the last state lasts until the end.
+
+    :param trace: columns of the trace
+    :return: (states, durations in seconds)
+    """
+    timestamps, names = trace["timestamp_ns"], trace["names"]
+    if len(timestamps) == 0:
+        return [], np.zeros(0)
+    begin = np.concatenate([[trace["start_ns"]], timestamps[:-1]])
+    states = np.concatenate([trace["prev_state"], trace["curr_state"][-1:]])
+    durations = np.concatenate([timestamps - begin, [trace["end_ns"] - timestamps[-1]]]) / 1e9
+    if trace["num_of_dropped"] > 0:  # begin of the first recorded stay unknown
+        states, durations = states[1:], durations[1:]
+    return [str(names[state]) for state in states], durations
+
+
+def analyze_traces(trace_files: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Aggregates the state transition traces of an instance set.
+
+    :param trace_files: trace files
+    :return: (time spent per state, transition counts, per-instance summary)
+    """
+    stays = []
+    transitions = Counter()
+    instances = []
+    for trace_file in trace_files:
+        trace = load_trace(trace_file)
+        instance = os.path.basename(trace_file).replace(".npz", "")
+        states, durations = get_state_durations(trace)
+        stays.extend(zip([instance] * len(states), states, durations))
+        names = trace["names"]
+        for prev, link, curr in zip(trace["prev_state"], trace["transition_link"], trace["curr_state"]):
+            transitions[(str(names[prev]), str(names[link]), str(names[curr]))] += 1
+        dominant_state = ""
+        if len(states) > 0:
+            time_per_state = pd.Series(durations).groupby(states).sum()
+            dominant_state = time_per_state.idxmax()
+        instances.append([
+            instance, (trace["end_ns"] - trace["start_ns"]) / 1e9, len(trace["timestamp_ns"]),
+            int(trace["num_of_dropped"]), dominant_state
+        ])
+
+    stays = pd.DataFrame(stays, columns=["instance", "state", "duration"])
+    state_res = stays.groupby("state")["duration"].agg(["sum", "mean", "max", "count"]).reset_index()
+    state_res.columns = ["state", "total_time (s)", "avg_time (s)", "max_time (s)", "visits"]
+    state_res["time_share"] = round(state_res["total_time (s)"] / state_res["total_time (s)"].sum(), 4)
+    state_res = state_res.sort_values("total_time (s)", ascending=False)
+
+    transition_res = pd.DataFrame(
+        [[prev, link, curr, count] for (prev, link, curr), count in transitions.most_common()],
+        columns=["prev_state", "transition_link", "curr_state", "count"]
+    )
+    instance_res = pd.DataFrame(
+        instances, columns=["instance", "trace_time (s)", "#transitions", "#dropped", "dominant_state"]
+    ).sort_values("trace_time (s)", ascending=False)
+    return state_res, transition_res, instance_res
+
+
+def test_trace_round_trip() -> None:
+    """
+    Tests that the state durations of a dumped trace (cf. `LocalDataProvider.dump_trace()`) match the recorded
+    transitions, with and without dropped transitions (ring buffer wrap).
+    """
+    from local_data_provider import LocalDataProvider
+
+    states = ["A", "B", "C", "D", "E", "F"]
+    for capacity in [8, 3]:
+        data_prov = LocalDataProvider(trace_capacity=capacity)
+        for prev_state, curr_state in zip(states, states[1:]):
+            data_prov.provide_state_transition(
+                SimpleNamespace(prev_state=prev_state, curr_state=curr_state, transition_link=prev_state + curr_state)
+            )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_prov.dump_trace(os.path.join(tmp_dir, "trace.npz"))
+            trace = load_trace(os.path.join(tmp_dir, "trace.npz"))
+        trace_states, durations = get_state_durations(trace)
+        timestamps = trace["timestamp_ns"]
+        if capacity == 8:
+            assert trace["num_of_dropped"] == 0 and trace_states == states
+            begin = np.concatenate([[trace["start_ns"]], timestamps])
+        else:  # first recorded stay (C) dropped, since it began with a dropped transition
+            assert trace["num_of_dropped"] == 2 and trace_states == states[3:]
+            begin = timestamps
+        assert np.allclose(durations, (np.concatenate([timestamps, [trace["end_ns"]]])[-len(begin):] - begin) / 1e9)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Aggregate the state transition traces of the evaluation.')
+    parser.add_argument('--traces', type=str, required=True)
+    parser.add_argument('--slowest', type=int, default=5)
+    args = parser.parse_args()
+
+    test_trace_round_trip()
+    state_res, transition_res, instance_res = analyze_traces(sorted(glob.glob(args.traces + "/*.npz")))
+    state_res.to_csv("trace_states.csv", index=False)
+    transition_res.to_csv("trace_transitions.csv", index=False)
+    instance_res.to_csv("trace_instances.csv", index=False)
+
+    print("time spent per state:")
+    print(state_res.to_string(index=False))
+    print("\nmost frequent transitions:")
+    print(transition_res.head(10).to_string(index=False))
+    print("\nslowest instances:")
+    print(instance_res.head(args.slowest).to_string(index=False))
@@ -7,5 +7,18 @@ DATASET_NAME = "nesy_diag"
 UPDATE_ENDPOINT = f"{FUSEKI_URL}/{DATASET_NAME}/update"
 DATA_ENDPOINT = f"{FUSEKI_URL}/{DATASET_NAME}/data"
 BACKUP_URL = f"{FUSEKI_URL}/{DATASET_NAME}/data?graph=default"
+KG_TRANSFER_COMPRESSION = False  # gzip-compressed uploads (`Content-Encoding: gzip`), requires server support
 SESSION_DIR = "session_files"
+MODEL_CACHE_SIZE = 8  # trained models kept in memory per process (LRU)
+TRACE_BUFFER_SIZE = 1 << 16  # most recent state transitions kept per instance (ring buffer)
 SIM_CLASSIFICATION_LOG_FILE = "sim_classifications.json"
+EVAL_WORKER_DIR = "eval_workers"  # working directories of parallel evaluation workers
+EVAL_MANIFEST_FILE = "eval_manifest.jsonl"  # evaluated instances (name + content hash), cf. `--resume`
+BUDGET_POLL_INTERVAL = 0.1  # seconds between budget checks of a supervised diagnosis
+BUDGET_KILL_GRACE_PERIOD = 2.0  # seconds between terminating and killing an aborted diagnosis (trace dump)
+INSTANCE_GRAPH_PREFIX = "urn:nesy_diag_bench:instance:"  # named graphs of the instance KGs (bulk loading)
+
+# vocabulary of the `nesy_diag_ontology` used by the `ExpertKnowledgeEnhancer` (offline KG serialization)
+ONTOLOGY_PREFIX = "http://www.semanticweb.org/nesy_diag_ontology#"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+XSD_INTEGER = "http://www.w3.org/2001/XMLSchema#integer"
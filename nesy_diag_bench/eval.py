@@ -3,56 +3,227 @@
 # @author Tim Bohne
 
 import argparse
+import contextlib
 import csv
 import glob
+import hashlib
+import io
 import json
 import logging
+import multiprocessing
+import multiprocessing.connection
 import os
+import shutil
+import signal
+import sys
+import tempfile
 import time
-from typing import List, Tuple
+from types import SimpleNamespace
+from typing import List, Tuple, Optional, Iterator, Mapping, Dict, Set, Callable
+from urllib.parse import urlsplit
 
 import numpy as np
-import requests
 import smach
-import tensorflow as tf
-from nesy_diag_smach.nesy_diag_state_machine import NeuroSymbolicDiagnosisStateMachine
 from termcolor import colored
 
-from config import UPDATE_ENDPOINT, DATA_ENDPOINT, SESSION_DIR, SIM_CLASSIFICATION_LOG_FILE
-from local_data_accessor import LocalDataAccessor
+import config
+from config import (
+    SESSION_DIR, SIM_CLASSIFICATION_LOG_FILE, INSTANCE_GRAPH_PREFIX, EVAL_WORKER_DIR, EVAL_MANIFEST_FILE,
+    BUDGET_POLL_INTERVAL, BUDGET_KILL_GRACE_PERIOD
+)
+from instance_io import get_instance_name, list_instances, open_kg_file, open_instance_file, ProblemInstance
+from kg_backend import InProcessKG
+from kg_transport import sparql_update, upload_to_kg, stream_file, create_dataset, delete_dataset, N_QUADS
+from local_data_accessor import LocalDataAccessor, preload_signal_stores
 from local_data_provider import LocalDataProvider
-from local_model_accessor import LocalModelAccessor
+from local_model_accessor import LocalModelAccessor, prewarm_model_cache
 from util import log_info, log_debug, log_warn, log_err
 
+INSTANCE_RES_HEADER = [
+    "instance", "TP", "TN", "FP", "FN", "#fp_dev", "acc", "prec", "rec", "spec", "F1", "ano_link_perc", "avg_model_acc",
+    "gt_match", "#fault_paths", "ratio_of_found_gtfp", "avg_fp_len", "runtime (s)", "classification_ratio",
+    "diag_success", "compensation_by_aff_by_savior", "missed_chances", "no_second_chance", "kg_clear (s)",
+    "kg_upload (s)", "smach (s)", "comparison (s)", "cpu_time (s)", "peak_rss (MB)", "status"
+]
 
-def run_smach(instance: str, verbose: bool, sim_models: bool, seed: int) -> str:
+
+def run_smach(
+        instance: ProblemInstance, verbose: bool, sim_models: bool, seed: int, trace_dir: Optional[str] = None,
+        data_prov: Optional[LocalDataProvider] = None
+) -> str:
     """
     Runs the diagnosis state machine.
 
-    :param instance: problem instance file
+    :param instance: problem instance
     :param verbose: whether logging should be activated
     :param sim_models: whether model simulation should be activated
     :param seed: seed for random processes
+    :param trace_dir: directory for the state transition trace of the instance (None -> not written)
+    :param data_prov: data provider recording the state transitions (None -> new one)
     :return: final output of the state machine, i.e., diagnosis
     """
+    # imported lazily, i.e., after the KG endpoint of the process is configured (cf. `configure_kg_endpoint()`)
+    from nesy_diag_smach.nesy_diag_state_machine import NeuroSymbolicDiagnosisStateMachine
+
     smach.set_loggers(log_info, log_debug, log_warn, log_err)  # set custom logging functions
 
     # init local implementations of I/O interfaces
     data_acc = LocalDataAccessor(instance)
     model_acc = LocalModelAccessor(instance)
-    data_prov = LocalDataProvider()
+    data_prov = LocalDataProvider() if data_prov is None else data_prov
 
     sm = NeuroSymbolicDiagnosisStateMachine(
         data_acc, model_acc, data_prov, verbose=verbose, sim_models=sim_models, seed=seed
     )
-    tf.get_logger().setLevel(logging.ERROR)
+    if not sim_models or "tensorflow" in sys.modules:  # TensorFlow is only imported for trained models
+        import tensorflow as tf
+        tf.get_logger().setLevel(logging.ERROR)
     sm.execute()
     final_out = sm.userdata.final_output
+    if trace_dir is not None:
+        data_prov.dump_trace(os.path.join(trace_dir, instance.name + ".npz"))
     if verbose:
         print("final output of smach execution (fault path(s)):", final_out)
     return final_out
 
 
+def run_smach_in_child(
+        conn: multiprocessing.connection.Connection, instance: str, verbose: bool, sim_models: bool, seed: int,
+        trace_dir: Optional[str], fuseki_url: str, dataset_name: str
+) -> None:
+    """
+    Runs the diagnosis state machine in a child process and sends its final output to the parent. The state machine
+    (as well as the models and signals) is loaded beforehand, and the child notifies the parent when the diagnosis
+    starts ("started"), i.e., the start of the process is neither part of the runtime nor of the resource usage of the
+    diagnosis, which are measured by the child itself and sent along with the final output. If the child is terminated
+    due to its budget, the state transitions recorded so far are written to the trace (cf.
+    `dump_trace_on_termination()`).
+
+    :param conn: connection to the parent process
+    :param instance: problem instance file
+    :param verbose: whether logging should be activated
+    :param sim_models: whether model simulation should be activated
+    :param seed: seed for random processes
+    :param trace_dir: directory for the state transition trace of the instance (None -> not written)
+    :param fuseki_url: URL of the KG server used by the parent
+    :param dataset_name: name of the dataset used by the parent
+    """
+    configure_kg_endpoint(fuseki_url, dataset_name)  # not inherited by spawned processes
+    # imported before the diagnosis starts (otherwise, imported by `run_smach()`)
+    from nesy_diag_smach.nesy_diag_state_machine import NeuroSymbolicDiagnosisStateMachine
+    problem_instance = ProblemInstance.load(instance)
+    if not sim_models:
+        prewarm_model_cache(problem_instance.suspect_components.keys())
+        preload_signal_stores(problem_instance.suspect_components.keys())
+    data_prov = LocalDataProvider()
+    if trace_dir is not None:
+        dump_trace_on_termination(data_prov, os.path.join(trace_dir, problem_instance.name + ".npz"))
+    peak_rss_reset = reset_peak_rss()
+    conn.send("started")
+    start_time = time.perf_counter()
+    start_cpu_time = time.process_time()
+    final_out = run_smach(problem_instance, verbose, sim_models, seed, trace_dir, data_prov)
+    conn.send((
+        final_out, time.perf_counter() - start_time, time.process_time() - start_cpu_time,
+        get_peak_rss() if peak_rss_reset else float("nan")
+    ))
+    conn.close()
+
+
+def dump_trace_on_termination(data_prov: LocalDataProvider, trace_file: str) -> None:
+    """
+    Writes the state transitions recorded by the data provider to the trace file when the current process is terminated
+    (SIGTERM), e.g., when a supervised diagnosis exceeds its budget (the process exits afterwards). Not effective if
+    the process is killed right away, i.e., if the trace is not written within `BUDGET_KILL_GRACE_PERIOD` (e.g., while
+    blocked in native code) or on platforms without SIGTERM handlers (Windows).
+
+    :param data_prov: data provider recording the state transitions
+    :param trace_file: trace file
+    """
+    def dump_trace_and_exit(signum: int, frame) -> None:
+        data_prov.dump_trace(trace_file)
+        os._exit(1)
+
+    signal.signal(signal.SIGTERM, dump_trace_and_exit)
+
+
+def get_rss(pid: int) -> Optional[float]:
+    """
+    Determines the current resident set size of the specified process.
+
+    :param pid: process id
+    :return: RSS in MB (None if unavailable, i.e., not on Linux)
+    """
+    try:
+        with open("/proc/" + str(pid) + "/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024.0 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def run_smach_with_budget(
+        instance: str, verbose: bool, sim_models: bool, seed: int, trace_dir: Optional[str],
+        time_budget: Optional[float], memory_budget: Optional[float], target: Callable = run_smach_in_child
+) -> Tuple[Optional[List[str]], str, float, Optional[Tuple[float, float]]]:
+    """
+    Runs the diagnosis state machine in a supervised child process (spawned, i.e., neither the threads of the
+    in-process KG server nor TensorFlow are forked), which is killed as soon as it exceeds the time or memory budget.
+    The time budget applies to the start of the child process and to the diagnosis (cf. `run_smach_in_child()`).
+    Aborted children are terminated first (SIGTERM, e.g., to write their trace) and killed after a grace period.
+
+    :param instance: problem instance file
+    :param verbose: whether logging should be activated
+    :param sim_models: whether model simulation should be activated
+    :param seed: seed for random processes
+    :param trace_dir: directory for the state transition trace of the instance (None -> not written)
+    :param time_budget: max wall-clock time in seconds (None -> unlimited)
+    :param memory_budget: max RSS in MB (None -> unlimited, requires `get_rss()`)
+    :param target: function run by the child process (cf. `run_smach_in_child()`)
+    :return: (final output of the state machine (None if aborted), status: "ok", "timed_out" or "memory_exceeded",
+              runtime of the diagnosis (until the abortion, NaN if aborted before it started),
+              (CPU time, peak RSS in MB) of the diagnosis (None if aborted))
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    child = ctx.Process(
+        target=target,
+        args=(child_conn, instance, verbose, sim_models, seed, trace_dir, config.FUSEKI_URL, config.DATASET_NAME)
+    )
+    start_time = time.perf_counter()
+    smach_start_time = None
+    child.start()
+    child_conn.close()
+    status = None
+    while status is None:
+        if parent_conn.poll(BUDGET_POLL_INTERVAL):
+            try:
+                msg = parent_conn.recv()
+            except EOFError:  # terminated without result
+                child.join()
+                raise RuntimeError(
+                    "diagnosis of " + instance + " failed (exit code of the child process: " + str(child.exitcode) + ")"
+                )
+            if msg == "started":
+                start_time = smach_start_time = time.perf_counter()
+                continue
+            child.join()
+            final_out, smach_time, cpu_time, peak_rss = msg
+            return final_out, "ok", smach_time, (cpu_time, peak_rss)
+        if time_budget is not None and time.perf_counter() - start_time > time_budget:
+            status = "timed_out"
+        elif memory_budget is not None:
+            rss = get_rss(child.pid)  # None -> the child just exited (availability is checked on startup)
+            if rss is not None and rss > memory_budget:
+                status = "memory_exceeded"
+    child.terminate()
+    child.join(BUDGET_KILL_GRACE_PERIOD)
+    if child.is_alive():
+        child.kill()
+        child.join()
+    smach_time = float("nan") if smach_start_time is None else time.perf_counter() - smach_start_time
+    return None, status, smach_time, None
+
+
 def clear_hosted_kg() -> bool:
     """
     Clears the hosted knowledge graph.
@@ -65,7 +236,7 @@ def clear_hosted_kg() -> bool:
             ?s ?p ?o .
         }
     """
-    resp = requests.post(UPDATE_ENDPOINT, data={"update": clear_query})
+    resp = sparql_update(clear_query)
     if resp.status_code == 200:
         print("dataset successfully cleared..")
         return True
@@ -81,9 +252,7 @@ def upload_kg_for_instance(instance: str) -> bool:
     :param instance: problem instance
     :return: whether KG was successfully uploaded
     """
-    kg_file = instance.replace(".json", ".nt")
-    with open(kg_file, "r") as f:
-        resp = requests.post(DATA_ENDPOINT, data=f, headers={"Content-Type": "application/n-triples"})
+    resp = upload_to_kg(lambda: stream_file(lambda: open_kg_file(instance)))
     if resp.status_code == 200:
         print("kg successfully uploaded")
         return True
@@ -92,6 +261,148 @@ def upload_kg_for_instance(instance: str) -> bool:
         return False
 
 
+def get_instance_graph(instance: str) -> str:
+    """
+    Determines the IRI of the named graph containing the KG of the specified instance.
+
+    :param instance: problem instance
+    :return: IRI of the named graph
+    """
+    return INSTANCE_GRAPH_PREFIX + get_instance_name(instance)
+
+
+def gen_instance_set_quads(instances: List[str]) -> Iterator[bytes]:
+    """
+    Lazily generates the KGs of all specified instances as quads (N-Quads), each instance in its own named graph.
+
+    :param instances: problem instances
+    :return: generator of quads
+    """
+    for instance in instances:
+        graph = (" <" + get_instance_graph(instance) + "> .\n").encode("utf-8")
+        with open_kg_file(instance) as f:
+            for line in f:
+                triple = line.strip()
+                if len(triple) > 0 and not triple.startswith(b"#"):
+                    yield triple[:-1].rstrip() + graph  # replace the terminating "."
+
+
+def bulk_load_instance_set_kgs(instances: List[str]) -> bool:
+    """
+    Replaces the content of the hosted KG by the KGs of all specified instances, each in its own named graph, using
+    a single (streamed) upload.
+
+    :param instances: problem instances
+    :return: whether KGs were successfully uploaded
+    """
+    resp = sparql_update("DROP ALL")
+    if resp.status_code != 200:
+        print("failed to clear dataset..")
+        return False
+    resp = upload_to_kg(lambda: gen_instance_set_quads(instances), N_QUADS)
+    if resp.status_code == 200:
+        print("kgs of", len(instances), "instances successfully uploaded")
+        return True
+    else:
+        print("failed to upload kgs", resp.text)
+        return False
+
+
+def activate_instance_graph(instance: str) -> bool:
+    """
+    Replaces the content of the default graph of the hosted KG by the named graph of the specified instance (the
+    state machine queries the default graph).
+
+    Note: the query tool of the ontology package only takes the server and the dataset (cf. `configure_kg_endpoint()`),
+    i.e., its queries cannot be directed at the named graph (e.g., via `default-graph-uri`). Thus, the default graph is
+    still rewritten (server-side) for each instance -- only the per-instance upload is saved, not the per-instance
+    update. The in-process backend serves the named graph directly (cf. `InProcessKG.use_graph()`).
+
+    :param instance: problem instance
+    :return: whether the graph was successfully activated
+    """
+    resp = sparql_update("COPY <" + get_instance_graph(instance) + "> TO DEFAULT")
+    if resp.status_code == 200:
+        return True
+    else:
+        print("failed to activate graph of", instance, resp.text)
+        return False
+
+
+def load_instance_set_kgs(instances: List[str], in_process_kg: Optional[InProcessKG]) -> None:
+    """
+    Loads the KGs of all specified instances into named graphs.
+
+    :param instances: problem instances
+    :param in_process_kg: in-process KG (None -> hosted KG)
+    """
+    if in_process_kg is None:
+        assert bulk_load_instance_set_kgs(instances)
+    else:
+        in_process_kg.load_nquads(b"".join(gen_instance_set_quads(instances)))
+
+
+def prepare_kg_for_instance(
+        instance: str, in_process_kg: Optional[InProcessKG], named_graphs: bool
+) -> Tuple[float, float]:
+    """
+    Replaces the content of the KG by the KG of the specified instance.
+
+    :param instance: problem instance
+    :param in_process_kg: in-process KG (None -> hosted KG)
+    :param named_graphs: whether the KGs of the instance set were loaded into named graphs beforehand
+    :return: (runtime of clearing the KG, runtime of loading the instance KG) in seconds
+    """
+    start_time = time.perf_counter()
+    if named_graphs:  # activating the named graph replaces the KG, i.e., no separate clearing
+        if in_process_kg is None:
+            assert activate_instance_graph(instance)
+        else:
+            in_process_kg.use_graph(get_instance_graph(instance))
+        return 0.0, time.perf_counter() - start_time
+    if in_process_kg is None:
+        assert clear_hosted_kg()
+        clear_time = time.perf_counter() - start_time
+        assert upload_kg_for_instance(instance)
+    else:
+        in_process_kg.clear()
+        clear_time = time.perf_counter() - start_time
+        with open_kg_file(instance) as f:
+            in_process_kg.load_ntriples(f.read())
+    return clear_time, time.perf_counter() - start_time - clear_time
+
+
+def reset_peak_rss() -> bool:
+    """
+    Resets the peak resident set size (high-water mark) of the current process to its current RSS, i.e., the peak
+    RSS is measured per instance instead of since the start of the process (Linux only).
+
+    :return: whether the peak RSS was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss() -> float:
+    """
+    Determines the peak resident set size of the current process since its last reset (cf. `reset_peak_rss()`).
+
+    :return: peak RSS in MB (NaN if unavailable)
+    """
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 2)  # kB
+    except OSError:
+        pass
+    return float("nan")
+
+
 def get_causal_links_from_fault_paths(fault_paths: List[List[str]]) -> List[str]:
     """
     Retrieves causal links from fault paths.
@@ -106,12 +417,65 @@ def get_causal_links_from_fault_paths(fault_paths: List[List[str]]) -> List[str]
     return links
 
 
+def get_result_file(instance: str) -> str:
+    """
+    Determines the result CSV file of the instance set the instance belongs to.
+
+    :param instance: problem instance file
+    :return: result CSV file (in the current working directory)
+    """
+    instance = get_instance_name(instance)
+    idx_suffix = "_" + instance.split("_")[-1]
+    return instance[:len(instance) - len(idx_suffix)] + ".csv"
+
+
+def write_csv_atomically(filename: str, rows: List[List]) -> None:
+    """
+    Writes the rows to the CSV file via a temporary file that atomically replaces the file, i.e., an interrupted
+    evaluation never leaves partially written rows.
+
+    :param filename: CSV file
+    :param rows: rows to be written (including header)
+    """
+    with open(filename + ".tmp", "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(filename + ".tmp", filename)
+
+
+def read_csv_rows(filename: str) -> List[List[str]]:
+    """
+    Reads all rows (including header) of the CSV file.
+
+    :param filename: CSV file
+    :return: rows (empty if the file does not exist)
+    """
+    if not os.path.isfile(filename):
+        return []
+    with open(filename, "r", newline="") as f:
+        return list(csv.reader(f))
+
+
+def get_complete_rows(rows: List[List[str]]) -> List[List[str]]:
+    """
+    Determines the complete result rows of a result CSV file, padded to the length of `INSTANCE_RES_HEADER`, i.e.,
+    results of previous versions (fewer columns) are extended (missing values are read as NaN), and partially written
+    rows of an interrupted evaluation are dropped (their instances are not recorded in the manifest).
+
+    :param rows: rows of the result CSV file (including header)
+    :return: complete result rows (without header)
+    """
+    return [row + [""] * (len(INSTANCE_RES_HEADER) - len(row)) for row in rows[1:] if len(row) == len(rows[0])]
+
+
 def write_instance_res_to_csv(
         instance: str, tp: int, tn: int, fp: int, fn: int, num_of_fp_deviation: int, accuracy: float, precision: float,
         recall: float, specificity: float, f1: float, found_anomaly_links_percentage: float, avg_model_acc: float,
         gt_match: bool, num_fps: int, avg_fp_len: float, runtime: float, classification_ratio: float,
         ratio_of_found_gtfp: float, diag_success: bool, compensation_by_aff_by_savior: int, missed_chances: int,
-        no_second_chance: int
+        no_second_chance: int, kg_clear_time: float, kg_upload_time: float, smach_time: float, comparison_time: float,
+        cpu_time: float, peak_rss: float
 ) -> None:
     """
     Writes the results for the instance to csv file.
@@ -139,40 +503,122 @@ def write_instance_res_to_csv(
     :param compensation_by_aff_by_savior: compensation by affected-by savior
     :param missed_chances: number of missed chances
     :param no_second_chance: 'no second chance' cases
+    :param kg_clear_time: runtime of clearing the KG
+    :param kg_upload_time: runtime of loading the instance KG
+    :param smach_time: runtime of the diagnosis state machine
+    :param comparison_time: runtime of the comparison with the ground truth
+    :param cpu_time: CPU time of the process for the instance (all phases)
+    :param peak_rss: peak RSS of the instance (MB)
     """
-    instance = instance.split("/")[1].replace(".json", "")
-    idx_suffix = "_" + instance.split("_")[-1]
-    filename = instance[:len(instance) - len(idx_suffix)] + ".csv"
-    file_exists = os.path.isfile(filename)
-    with open(filename, mode='a', newline='') as csv_file:
-        writer = csv.writer(csv_file)
-        if not file_exists:
-            writer.writerow(
-                ["instance", "TP", "TN", "FP", "FN", "#fp_dev", "acc", "prec", "rec", "spec", "F1", "ano_link_perc",
-                 "avg_model_acc", "gt_match", "#fault_paths", "ratio_of_found_gtfp", "avg_fp_len", "runtime (s)",
-                 "classification_ratio", "diag_success", "compensation_by_aff_by_savior", "missed_chances",
-                 "no_second_chance"]
-            )
-        writer.writerow(
-            [instance, tp, tn, fp, fn, num_of_fp_deviation, accuracy, precision, recall, specificity, f1,
-             found_anomaly_links_percentage, avg_model_acc, gt_match, num_fps, ratio_of_found_gtfp, avg_fp_len, runtime,
-             classification_ratio, diag_success, compensation_by_aff_by_savior, missed_chances, no_second_chance]
-        )
+    append_instance_res_row(
+        instance,
+        [get_instance_name(instance), tp, tn, fp, fn, num_of_fp_deviation, accuracy, precision, recall, specificity,
+         f1, found_anomaly_links_percentage, avg_model_acc, gt_match, num_fps, ratio_of_found_gtfp, avg_fp_len,
+         runtime, classification_ratio, diag_success, compensation_by_aff_by_savior, missed_chances, no_second_chance,
+         round(kg_clear_time, 3), round(kg_upload_time, 3), round(smach_time, 3), round(comparison_time, 3),
+         round(cpu_time, 3), peak_rss, "ok"]
+    )
+
+
+def write_censored_instance_res_to_csv(
+        instance: str, ground_truth_fault_paths: List[List[str]], runtime: float, kg_clear_time: float,
+        kg_upload_time: float, smach_time: float, status: str
+) -> None:
+    """
+    Writes a censored result for the instance (diagnosis aborted due to its budget) to csv file, i.e., only the
+    runtimes (lower bounds) and the measures of the ground truth fault paths are known, all other measures are NaN.
+
+    :param instance: problem instance file
+    :param ground_truth_fault_paths: ground truth fault paths
+    :param runtime: runtime until the abortion
+    :param kg_clear_time: runtime of clearing the KG
+    :param kg_upload_time: runtime of loading the instance KG
+    :param smach_time: runtime of the diagnosis state machine until the abortion
+    :param status: reason of the abortion, i.e., "timed_out" or "memory_exceeded"
+    """
+    res = {
+        "instance": get_instance_name(instance), "runtime (s)": runtime, "kg_clear (s)": round(kg_clear_time, 3),
+        "kg_upload (s)": round(kg_upload_time, 3), "smach (s)": round(smach_time, 3), "status": status,
+        "#fault_paths": len(ground_truth_fault_paths),
+        "avg_fp_len": round(np.average([len(fp) for fp in ground_truth_fault_paths]), 2)
+    }
+    append_instance_res_row(instance, [res.get(col, "NaN") for col in INSTANCE_RES_HEADER])
+
+
+def record_censored_instance(
+        instance: str, instance_hash: str, ground_truth_fault_paths: List[List[str]], runtime: float,
+        kg_clear_time: float, kg_upload_time: float, smach_time: float, status: str
+) -> None:
+    """
+    Records the censored result of the instance (cf. `write_censored_instance_res_to_csv()`) as evaluated, i.e., it is
+    not evaluated again when resuming.
+
+    :param instance: problem instance file
+    :param instance_hash: content hash of the problem instance file
+    :param ground_truth_fault_paths: ground truth fault paths
+    :param runtime: runtime until the abortion
+    :param kg_clear_time: runtime of clearing the KG
+    :param kg_upload_time: runtime of loading the instance KG
+    :param smach_time: runtime of the diagnosis state machine until the abortion
+    :param status: reason of the abortion, i.e., "timed_out" or "memory_exceeded"
+    """
+    write_censored_instance_res_to_csv(
+        instance, ground_truth_fault_paths, runtime, kg_clear_time, kg_upload_time, smach_time, status
+    )
+    record_in_manifest(EVAL_MANIFEST_FILE, [{"instance": get_instance_name(instance), "sha256": instance_hash}])
+
+
+def append_instance_res_row(instance: str, row: List) -> None:
+    """
+    Appends the result row of the instance to the csv file of its instance set (flushed to disk). A row that is only
+    partially written due to an interrupted evaluation belongs to an instance not yet recorded in the manifest, i.e.,
+    it is removed when resuming (cf. `get_pending_instances()`).
+
+    :param instance: problem instance file
+    :param row: result row (cf. `INSTANCE_RES_HEADER`)
+    """
+    filename = get_result_file(instance)
+    rows = []
+    if os.path.isfile(filename):
+        with open(filename, "r", newline="") as f:
+            rows = [next(csv.reader(f), [])]
+    if rows != [INSTANCE_RES_HEADER]:
+        # new file or results of previous versions -> the header is extended once (missing values are read as NaN)
+        write_csv_atomically(filename, [INSTANCE_RES_HEADER] + get_complete_rows(read_csv_rows(filename)))
+    line = io.StringIO()
+    csv.writer(line).writerow(row)
+    with open(filename, "ab+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":  # partially written row of an interrupted evaluation
+            f.write(b"\n")
+        f.write(line.getvalue().encode())
+        f.flush()
+        os.fsync(f.fileno())
 
 
 def evaluate_instance_res(
-        instance: str, ground_truth_fault_paths: List[List[str]], determined_fault_paths: List[List[str]],
-        runtime: float, diag_success: bool
+        instance: str, ground_truth_fault_paths: List[List[str]], ground_truth_components: Mapping[str, Tuple],
+        determined_fault_paths: List[List[str]], runtime: float, diag_success: bool, kg_clear_time: float,
+        kg_upload_time: float, smach_time: float, start_cpu_time: float, peak_rss_reset: bool,
+        child_usage: Optional[Tuple[float, float]] = None
 ) -> None:
     """
     Evaluates the instance-level results.
 
     :param instance: problem instance file
     :param ground_truth_fault_paths: ground truth fault paths
+    :param ground_truth_components: ground truth suspect components (anomalies and affected-by relations)
     :param determined_fault_paths: determined fault paths
     :param runtime: runtime
     :param diag_success: whether diagnosis successful
+    :param kg_clear_time: runtime of clearing the KG
+    :param kg_upload_time: runtime of loading the instance KG
+    :param smach_time: runtime of the diagnosis state machine
+    :param start_cpu_time: CPU time of the process at the start of the instance
+    :param peak_rss_reset: whether the peak RSS was reset at the start of the instance (otherwise not recorded)
+    :param child_usage: (CPU time, peak RSS in MB) of the diagnosis in a child process (None -> in this process)
     """
+    start_time = time.perf_counter()
     true_positives = []
     false_positives = []
     true_negatives = []
@@ -259,19 +705,29 @@ def evaluate_instance_res(
     avg_fp_len = round(np.average([len(fp) for fp in ground_truth_fault_paths]), 2)
 
     # ratio of classified components to all components
-    classification_ratio = round(float(tp + fp + tn + fn) / float(instance.split("/")[1].split("_")[0]), 2)
+    classification_ratio = round(float(tp + fp + tn + fn) / float(get_instance_name(instance).split("_")[0]), 2)
 
-    compensation_by_aff_by_savior, missed_chances, no_second_chance = measure_compensation(tp, tn, fp, fn)
+    compensation_by_aff_by_savior, missed_chances, no_second_chance = measure_compensation(
+        tp, tn, fp, fn, ground_truth_components
+    )
+    cpu_time = time.process_time() - start_cpu_time
+    peak_rss = get_peak_rss() if peak_rss_reset else float("nan")
+    if child_usage is not None:  # the diagnosis itself ran in a child process
+        cpu_time += child_usage[0]
+        peak_rss = float(np.fmax(peak_rss, child_usage[1]))
 
     write_instance_res_to_csv(
         instance, tp, tn, fp, fn, num_of_fp_deviation, accuracy, precision, recall, specificity, f1,
         found_anomaly_links_percentage, round(np.average(model_accuracies), 2), gt_match, num_fps, avg_fp_len, runtime,
         classification_ratio, ratio_of_found_gtfp, diag_success, compensation_by_aff_by_savior, missed_chances,
-        no_second_chance
+        no_second_chance, kg_clear_time, kg_upload_time, smach_time, time.perf_counter() - start_time,
+        cpu_time, peak_rss
     )
 
 
-def measure_compensation(tp: int, tn: int, fp: int, fn: int) -> Tuple[int, int, int]:
+def measure_compensation(
+        tp: int, tn: int, fp: int, fn: int, ground_truth_components: Mapping[str, Tuple]
+) -> Tuple[int, int, int]:
     """
     Measures the three types of compensation (cf. paper for definitions):
         - compensation_by_aff_by_savior
@@ -282,6 +738,7 @@ def measure_compensation(tp: int, tn: int, fp: int, fn: int) -> Tuple[int, int,
     :param tn: number of true negatives
     :param fp: number of false positives
     :param fn: number of false negatives
+    :param ground_truth_components: ground truth suspect components (anomalies and affected-by relations)
     :return: (compensation_by_aff_by_savior, missed_chances, no_second_chance)
     """
     with open(SESSION_DIR + "/" + "classifications.json", 'r') as file:
@@ -335,37 +792,567 @@ def measure_compensation(tp: int, tn: int, fp: int, fn: int) -> Tuple[int, int,
     return compensation_aff_by_savior, missed_chance, no_second_chance
 
 
+def hash_instance(instance: str) -> str:
+    """
+    Computes the content hash of the problem instance file.
+
+    :param instance: problem instance file
+    :return: SHA-256 hex digest
+    """
+    sha256 = hashlib.sha256()
+    with open_instance_file(instance) as f:
+        for chunk in iter(lambda: f.read(io.DEFAULT_BUFFER_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def read_manifest(manifest_file: str) -> Dict[str, str]:
+    """
+    Reads the manifest of evaluated instances.
+
+    :param manifest_file: manifest file (JSON lines)
+    :return: {instance name: content hash}
+    """
+    completed = {}
+    if not os.path.isfile(manifest_file):
+        return completed
+    with open(manifest_file, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:  # incomplete last line of an interrupted evaluation
+                continue
+            completed[entry["instance"]] = entry["sha256"]
+    return completed
+
+
+def record_in_manifest(manifest_file: str, entries: List[Dict[str, str]]) -> None:
+    """
+    Records the evaluated instances in the manifest (after their results are written).
+
+    :param manifest_file: manifest file (JSON lines)
+    :param entries: manifest entries, i.e., {"instance": instance name, "sha256": content hash}
+    """
+    with open(manifest_file, "ab+") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":  # incomplete last line of an interrupted evaluation
+                f.write(b"\n")
+        for entry in entries:
+            f.write((json.dumps(entry) + "\n").encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def evaluate_instance(
+        instance: str, in_process_kg: Optional[InProcessKG], named_graphs: bool, verbose: bool, sim_models: bool,
+        trace_dir: Optional[str] = None, time_budget: Optional[float] = None, memory_budget: Optional[float] = None
+) -> None:
+    """
+    Solves the problem instance with the diagnosis state machine and evaluates the result (written to the CSV file of
+    the instance set in the current working directory).
+
+    :param instance: problem instance file
+    :param in_process_kg: in-process KG (None -> hosted KG)
+    :param named_graphs: whether the KGs of the instance set were loaded into named graphs beforehand
+    :param verbose: whether logging should be activated
+    :param sim_models: whether model simulation should be activated
+    :param trace_dir: directory for the state transition traces (None -> not written)
+    :param time_budget: max wall-clock time of the diagnosis in seconds (None -> unlimited)
+    :param memory_budget: max RSS of the diagnosis in MB (None -> unlimited)
+    """
+    print("working on instance:", instance)
+    problem_instance = ProblemInstance.load(instance)  # shared by the accessors and the evaluation
+    if problem_instance.exceeds_max_fault_paths:  # no ground truth fault paths generated
+        print(colored("skipping instance exceeding the max number of fault paths", "yellow", "on_grey", ["bold"]))
+        return
+    instance_hash = hash_instance(instance)
+    start_time = time.time()
+    start_cpu_time = time.process_time()
+    peak_rss_reset = reset_peak_rss()
+    kg_clear_time, kg_upload_time = prepare_kg_for_instance(instance, in_process_kg, named_graphs)
+    seed = instance.split("_")[-2]
+    if time_budget is None and memory_budget is None:
+        smach_start_time = time.perf_counter()
+        fault_paths, status, child_usage = run_smach(problem_instance, verbose, sim_models, seed, trace_dir), "ok", None
+        smach_time = time.perf_counter() - smach_start_time
+    else:  # supervised child process
+        fault_paths, status, smach_time, child_usage = run_smach_with_budget(
+            instance, verbose, sim_models, seed, trace_dir, time_budget, memory_budget
+        )
+    if status != "ok":
+        print(colored("diagnosis aborted (" + status + ") -- censored result", "red", "on_white", ["bold"]))
+        record_censored_instance(
+            instance, instance_hash, [list(fp) for fp in problem_instance.ground_truth_fault_paths],
+            round(time.time() - start_time, 2), kg_clear_time, kg_upload_time, smach_time, status
+        )
+        return
+
+    # compare to ground truth
+    ground_truth_fault_paths = [list(fp) for fp in problem_instance.ground_truth_fault_paths]
+    ground_truth_components = problem_instance.suspect_components
+    diag_success = fault_paths != "no_diag"
+    determined_fault_paths = [path.split(" -> ") for path in fault_paths] if diag_success else []
+
+    if verbose:
+        print("#####################################################################")
+        print("GROUND TRUTH FAULT PATHS:", ground_truth_fault_paths)
+        print("DETERMINED FAULT PATHS:", determined_fault_paths)
+        print("#####################################################################")
+    end_time = time.time()
+    runtime = round(end_time - start_time, 2)
+    evaluate_instance_res(
+        instance, ground_truth_fault_paths, ground_truth_components, determined_fault_paths, runtime, diag_success,
+        kg_clear_time, kg_upload_time, smach_time, start_cpu_time, peak_rss_reset, child_usage
+    )
+    # recorded after the result row is written (cf. `get_pending_instances()`)
+    record_in_manifest(EVAL_MANIFEST_FILE, [{"instance": get_instance_name(instance), "sha256": instance_hash}])
+    if verbose:
+        for fault_path in fault_paths:
+            print(colored(fault_path, "red", "on_white", ["bold"]))
+
+
+def evaluate_instances(instances: List[str], args: argparse.Namespace, fuseki_url: str = config.FUSEKI_URL) -> None:
+    """
+    Evaluates the specified problem instances one after another.
+
+    :param instances: problem instance files
+    :param args: arguments of the evaluation
+    :param fuseki_url: URL of the (in-process) KG server
+    """
+    kg = None
+    if args.kg_backend == "inprocess":
+        kg = InProcessKG(config.DATASET_NAME)
+        kg.start(fuseki_url)  # serves the SPARQL endpoints on the address of the Fuseki server
+
+    if args.named_graphs:  # one upload for the entire instance set
+        load_instance_set_kgs(instances, kg)
+    supervised = args.time_budget is not None or args.memory_budget is not None
+    if not args.sim and len(instances) > 0:  # trained models and signal stores are loaded once per process
+        components = ProblemInstance.load(instances[0]).suspect_components.keys()
+        if not supervised:  # otherwise, the models are loaded by the child processes
+            prewarm_model_cache(components)
+        preload_signal_stores(components)
+    for instance in instances:
+        evaluate_instance(
+            instance, kg, args.named_graphs, args.v, args.sim, args.trace, args.time_budget, args.memory_budget
+        )
+    if args.sim and "tensorflow" in sys.modules:  # not imported by the local implementations for simulated models
+        print("note: TensorFlow was imported by the diagnosis state machine despite --sim")
+
+    if kg is not None:
+        kg.stop()
+
+
+def configure_kg_endpoint(fuseki_url: str, dataset_name: str) -> None:
+    """
+    Configures the KG endpoint (server and dataset) used by the current process, i.e., by the KG operations of the
+    evaluation as well as by the diagnosis state machine. Has to be called before the state machine is imported,
+    since the query tool of the ontology package reads its config on import.
+
+    :param fuseki_url: URL of the KG server
+    :param dataset_name: name of the dataset
+    """
+    import nesy_diag_ontology.config as ontology_config
+    missing = [attr for attr in ["FUSEKI_URL", "DATASET_NAME"] if not hasattr(ontology_config, attr)]
+    if len(missing) > 0:  # the state machine would silently query the shared dataset
+        raise RuntimeError(
+            "cannot isolate the KG endpoint -- nesy_diag_ontology.config lacks " + ", ".join(missing)
+        )
+    config.FUSEKI_URL = fuseki_url
+    config.DATASET_NAME = dataset_name
+    trailing_slash = "/" if ontology_config.FUSEKI_URL.endswith("/") else ""
+    ontology_config.FUSEKI_URL = fuseki_url + trailing_slash
+    ontology_config.DATASET_NAME = dataset_name
+
+
+def create_empty_dataset(dataset_name: str) -> None:
+    """
+    Creates an empty dataset on the Fuseki server -- a leftover dataset of the same name (e.g., of an interrupted
+    evaluation) is deleted and recreated.
+
+    :param dataset_name: name of the dataset
+    """
+    resp = create_dataset(dataset_name)
+    if resp.status_code == 409:  # already exists
+        delete_dataset(dataset_name)
+        resp = create_dataset(dataset_name)
+    if resp.status_code != 200:
+        raise RuntimeError("failed to create dataset " + dataset_name + " (HTTP status " + str(resp.status_code) + ")")
+
+
+def get_worker_dir(base_dir: str, worker_id: int) -> str:
+    """
+    Determines the working directory of the specified evaluation worker.
+
+    :param base_dir: working directory of the evaluation
+    :param worker_id: id of the worker
+    :return: working directory of the worker
+    """
+    return os.path.join(base_dir, EVAL_WORKER_DIR, "worker_" + str(worker_id))
+
+
+def run_worker(worker_id: int, instances: List[str], args: argparse.Namespace, base_dir: str) -> None:
+    """
+    Evaluates the specified problem instances in an isolated environment:
+        - own dataset (Fuseki) or own in-process KG server (port of the Fuseki server + 1 + worker id)
+        - own working directory, i.e., own session files and own result CSV files (shards)
+
+    :param worker_id: id of the worker
+    :param instances: problem instance files (absolute paths)
+    :param args: arguments of the evaluation
+    :param base_dir: working directory of the evaluation (resources are linked into the worker's directory)
+    """
+    worker_dir = get_worker_dir(base_dir, worker_id)
+    os.makedirs(worker_dir, exist_ok=True)
+    if os.path.isdir(os.path.join(base_dir, "res")) and not os.path.exists(os.path.join(worker_dir, "res")):
+        os.symlink(os.path.join(base_dir, "res"), os.path.join(worker_dir, "res"))
+    os.chdir(worker_dir)
+
+    dataset_name = config.DATASET_NAME + "_worker_" + str(worker_id)
+    fuseki_url = config.FUSEKI_URL
+    if args.kg_backend == "inprocess":
+        address = urlsplit(fuseki_url)
+        fuseki_url = address.scheme + "://" + address.hostname + ":" + str(address.port + 1 + worker_id)
+    configure_kg_endpoint(fuseki_url, dataset_name)
+    if args.kg_backend == "fuseki":
+        create_empty_dataset(dataset_name)
+    try:
+        evaluate_instances(instances, args, fuseki_url)
+    finally:
+        if args.kg_backend == "fuseki":
+            delete_dataset(dataset_name)
+
+
+def merge_result_shards(shard_dirs: List[str], target_dir: str) -> None:
+    """
+    Merges the result CSV files (shards) and manifests of the evaluation workers into the result CSV files of the
+    instance sets and the manifest of the evaluation (appended to existing files, rows sorted by instance). Each merged
+    file atomically replaces the original one, and rows of instances evaluated again replace their previous rows, i.e.,
+    merging is idempotent. Merged shards are removed afterwards.
+
+    :param shard_dirs: directories containing the shards
+    :param target_dir: directory of the merged result CSV files
+    """
+    shards = {}
+    for shard_dir in shard_dirs:
+        for shard in glob.glob(os.path.join(shard_dir, "*.csv")):
+            shards.setdefault(os.path.basename(shard), []).append(shard)
+    for filename, shard_files in shards.items():
+        target = os.path.join(target_dir, filename)
+        new_rows = []
+        for shard in shard_files:
+            new_rows.extend(get_complete_rows(read_csv_rows(shard)))
+        new_rows.sort(key=lambda row: int(row[0].split("_")[-1]))  # instance index
+        merged_instances = {row[0] for row in new_rows}
+        existing_rows = get_complete_rows(read_csv_rows(target))
+        existing_rows = [row for row in existing_rows if row[0] not in merged_instances]
+        write_csv_atomically(target, [INSTANCE_RES_HEADER] + existing_rows + new_rows)
+
+    manifests = [os.path.join(d, EVAL_MANIFEST_FILE) for d in shard_dirs]
+    manifests = [manifest for manifest in manifests if os.path.isfile(manifest)]
+    for manifest in manifests:
+        completed = read_manifest(manifest)
+        record_in_manifest(
+            os.path.join(target_dir, EVAL_MANIFEST_FILE),
+            [{"instance": instance, "sha256": instance_hash} for instance, instance_hash in completed.items()]
+        )
+    for merged_file in [shard for shard_files in shards.values() for shard in shard_files] + manifests:
+        os.remove(merged_file)
+
+
+def get_pending_instances(instances: List[str]) -> List[str]:
+    """
+    Determines the instances that still have to be evaluated when resuming an interrupted evaluation, i.e., those that
+    are not recorded in the manifest with their current content hash. Results of unrecorded instances (e.g., the row
+    was written, but the evaluation was interrupted before recording it) as well as partially written rows are removed
+    from the result CSV files, since these instances are evaluated again. Remaining results of the workers of an
+    interrupted parallel evaluation are merged beforehand.
+
+    :param instances: problem instance files
+    :return: pending problem instance files
+    """
+    base_dir = os.getcwd()
+    if os.path.isdir(os.path.join(base_dir, EVAL_WORKER_DIR)):
+        merge_result_shards(sorted(glob.glob(os.path.join(base_dir, EVAL_WORKER_DIR, "worker_*"))), base_dir)
+    completed = read_manifest(EVAL_MANIFEST_FILE)
+    pending = [
+        instance for instance in instances if completed.get(get_instance_name(instance)) != hash_instance(instance)
+    ]
+    pending_names: Set[str] = {get_instance_name(instance) for instance in pending}
+    for result_file in dict.fromkeys(get_result_file(instance) for instance in pending):
+        rows = read_csv_rows(result_file)
+        if len(rows) == 0:
+            continue
+        # partially written rows are incomplete (even if the instance name is cut off)
+        remaining = [row for row in rows[1:] if len(row) == len(rows[0]) and row[0] not in pending_names]
+        if len(remaining) < len(rows) - 1:
+            write_csv_atomically(result_file, rows[:1] + remaining)
+    print("resuming evaluation:", len(instances) - len(pending), "of", len(instances), "instances already evaluated")
+    return pending
+
+
+def evaluate_instances_in_parallel(instances: List[str], args: argparse.Namespace) -> None:
+    """
+    Evaluates the specified problem instances with `args.workers` worker processes (cf. `run_worker()`), each
+    processing every n-th instance, and merges the results of the workers afterwards.
+
+    :param instances: problem instance files
+    :param args: arguments of the evaluation
+    """
+    base_dir = os.getcwd()
+    instances = [os.path.abspath(instance) for instance in instances]
+    # "spawn" -> the state machine (and the ontology config) is not inherited, but imported by each worker
+    ctx = multiprocessing.get_context("spawn")
+    workers = [
+        ctx.Process(target=run_worker, args=(worker_id, instances[worker_id::args.workers], args, base_dir))
+        for worker_id in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    worker_dirs = [get_worker_dir(base_dir, worker_id) for worker_id in range(args.workers)]
+    merge_result_shards(worker_dirs, base_dir)
+    for worker, worker_dir in zip(workers, worker_dirs):
+        if worker.exitcode == 0:
+            shutil.rmtree(worker_dir)
+        else:  # keep session files for inspection
+            print("worker failed (exit code " + str(worker.exitcode) + "), see", worker_dir)
+    if len(os.listdir(os.path.join(base_dir, EVAL_WORKER_DIR))) == 0:
+        os.rmdir(os.path.join(base_dir, EVAL_WORKER_DIR))
+
+
+@contextlib.contextmanager
+def temporary_working_dir() -> Iterator[str]:
+    """
+    Changes the working directory to a temporary directory (removed afterwards), e.g., for tests.
+
+    :return: temporary directory
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            yield tmp_dir
+        finally:
+            os.chdir(cwd)
+
+
+def gen_test_res_row(instance: str, value: str = "0") -> List[str]:
+    """
+    Generates a result row for tests.
+
+    :param instance: instance name
+    :param value: value of all result columns
+    :return: result row
+    """
+    return [instance] + [value] * (len(INSTANCE_RES_HEADER) - 1)
+
+
+def test_record_in_manifest() -> None:
+    """
+    Tests that recording in a manifest with an incomplete last line (interrupted evaluation) repairs the manifest.
+    """
+    with temporary_working_dir():
+        with open(EVAL_MANIFEST_FILE, "w") as f:
+            f.write(json.dumps({"instance": "set_0", "sha256": "a"}) + "\n" + '{"instance": "set_1", "sha')
+        record_in_manifest(EVAL_MANIFEST_FILE, [{"instance": "set_2", "sha256": "c"}])
+        assert read_manifest(EVAL_MANIFEST_FILE) == {"set_0": "a", "set_2": "c"}
+        record_in_manifest(EVAL_MANIFEST_FILE, [{"instance": "set_1", "sha256": "b"}])
+        assert read_manifest(EVAL_MANIFEST_FILE) == {"set_0": "a", "set_1": "b", "set_2": "c"}
+
+
+def test_merge_result_shards() -> None:
+    """
+    Tests that merging the shards of the workers replaces the rows of instances evaluated again, extends results of
+    previous versions, skips partially written rows and is idempotent.
+    """
+    with temporary_working_dir():
+        old_header = INSTANCE_RES_HEADER[:2]  # results of a previous version
+        write_csv_atomically("set.csv", [old_header, ["set_1", "old"], ["set_5", "old"], ["set_"]])
+        for _ in range(2):  # second merge of the same shards -> identical results
+            for worker_id, instances in enumerate([["set_0", "set_2"], ["set_1"]]):
+                os.makedirs("worker_" + str(worker_id), exist_ok=True)
+                rows = [INSTANCE_RES_HEADER] + [gen_test_res_row(instance) for instance in instances]
+                write_csv_atomically(os.path.join("worker_" + str(worker_id), "set.csv"), rows + [["set_3", "0"]])
+                record_in_manifest(
+                    os.path.join("worker_" + str(worker_id), EVAL_MANIFEST_FILE),
+                    [{"instance": instance, "sha256": "x"} for instance in instances]
+                )
+            merge_result_shards(["worker_0", "worker_1"], ".")
+            assert read_csv_rows("set.csv") == [INSTANCE_RES_HEADER] + get_complete_rows(
+                [old_header, ["set_5", "old"]]
+            ) + [gen_test_res_row(instance) for instance in ["set_0", "set_1", "set_2"]]
+            assert read_manifest(EVAL_MANIFEST_FILE) == {"set_0": "x", "set_1": "x", "set_2": "x"}
+            assert glob.glob("worker_*/*") == []
+
+
+def test_get_pending_instances() -> None:
+    """
+    Tests that resuming evaluates unrecorded and modified instances again, removes their (partially written) results
+    and merges the remaining results of the workers beforehand.
+    """
+    with temporary_working_dir():
+        os.makedirs("instances")
+        instances = []
+        for idx in range(5):
+            instances.append(os.path.join("instances", "set_" + str(idx) + ".json"))
+            with open(instances[-1], "w") as f:
+                json.dump({"idx": idx}, f)
+        for instance in instances[:3]:
+            append_instance_res_row(instance, gen_test_res_row(get_instance_name(instance)))
+        record_in_manifest(EVAL_MANIFEST_FILE, [
+            {"instance": "set_0", "sha256": hash_instance(instances[0])},
+            {"instance": "set_1", "sha256": "modified"}
+        ])
+        with open("set.csv", "a") as f:  # interrupted while writing the row of set_3
+            f.write(",".join(gen_test_res_row("set_3"))[:3])
+        worker_dir = os.path.join(EVAL_WORKER_DIR, "worker_0")
+        os.makedirs(worker_dir)
+        write_csv_atomically(os.path.join(worker_dir, "set.csv"), [INSTANCE_RES_HEADER, gen_test_res_row("set_4")])
+        record_in_manifest(os.path.join(worker_dir, EVAL_MANIFEST_FILE), [
+            {"instance": "set_4", "sha256": hash_instance(instances[4])}
+        ])
+
+        assert get_pending_instances(instances) == instances[1:4]
+        assert read_csv_rows("set.csv") == [INSTANCE_RES_HEADER] + [gen_test_res_row(i) for i in ["set_0", "set_4"]]
+        assert get_pending_instances(instances) == instances[1:4]  # idempotent
+        append_instance_res_row(instances[1], gen_test_res_row("set_1", "1"))
+        assert read_csv_rows("set.csv")[-1] == gen_test_res_row("set_1", "1")
+
+
+def test_resume_functionality() -> None:
+    """
+    Tests the functionality of resuming interrupted (parallel) evaluations.
+    """
+    test_record_in_manifest()
+    test_merge_result_shards()
+    test_get_pending_instances()
+
+
+def complete_in_child(conn: multiprocessing.connection.Connection, instance: str, *args) -> None:
+    """
+    Test target of the supervised child process (cf. `run_smach_in_child()`) that completes immediately.
+
+    :param conn: connection to the parent process
+    :param instance: problem instance file
+    """
+    conn.send("started")
+    conn.send((["C0 -> C1"], 0.5, 0.25, 42.0))
+
+
+def sleep_in_child(
+        conn: multiprocessing.connection.Connection, instance: str, verbose: bool, sim_models: bool, seed: int,
+        trace_dir: Optional[str], *args
+) -> None:
+    """
+    Test target of the supervised child process (cf. `run_smach_in_child()`) that exceeds any reasonable time budget
+    after a single state transition.
+
+    :param conn: connection to the parent process
+    :param instance: problem instance file
+    :param verbose: whether logging should be activated
+    :param sim_models: whether model simulation should be activated
+    :param seed: seed for random processes
+    :param trace_dir: directory for the state transition trace of the instance
+    """
+    data_prov = LocalDataProvider()
+    data_prov.provide_state_transition(SimpleNamespace(prev_state="A", curr_state="B", transition_link="AB"))
+    dump_trace_on_termination(data_prov, os.path.join(trace_dir, get_instance_name(instance) + ".npz"))
+    conn.send("started")
+    time.sleep(60)
+
+
+def allocate_in_child(conn: multiprocessing.connection.Connection, *args) -> None:
+    """
+    Test target of the supervised child process (cf. `run_smach_in_child()`) that allocates 400 MB.
+
+    :param conn: connection to the parent process
+    """
+    conn.send("started")
+    memory = b"x" * (400 * 1024 ** 2)
+    time.sleep(60)
+    conn.send(len(memory))
+
+
+def crash_in_child(*args) -> None:
+    """
+    Test target of the supervised child process (cf. `run_smach_in_child()`) that terminates without result.
+    """
+    os._exit(3)
+
+
+def test_supervision() -> None:
+    """
+    Tests the supervision of the diagnosis in child processes, i.e., completion, abortion due to the time budget
+    (including the trace dump) and the memory budget, failed children as well as the recorded censored results.
+    """
+    with temporary_working_dir() as tmp_dir:
+        res = run_smach_with_budget("set_0.json", False, True, 42, None, 30.0, None, complete_in_child)
+        assert res == (["C0 -> C1"], "ok", 0.5, (0.25, 42.0))
+
+        final_out, status, smach_time, usage = run_smach_with_budget(
+            "set_1.json", False, True, 42, tmp_dir, 3.0, None, sleep_in_child
+        )
+        assert final_out is None and status == "timed_out" and usage is None and smach_time >= 3.0
+        with np.load(os.path.join(tmp_dir, "set_1.npz")) as trace:  # written on termination
+            assert len(trace["timestamp_ns"]) == 1
+
+        if get_rss(os.getpid()) is not None:
+            final_out, status, _, usage = run_smach_with_budget(
+                "set_2.json", False, True, 42, None, 30.0, 250.0, allocate_in_child
+            )
+            assert final_out is None and status == "memory_exceeded" and usage is None
+
+        try:
+            run_smach_with_budget("set_3.json", False, True, 42, None, 30.0, None, crash_in_child)
+            assert False, "failed child not detected"
+        except RuntimeError as e:
+            assert "exit code of the child process: 3" in str(e)
+
+        record_censored_instance("set_1.json", "abc", [["C0", "C1"], ["C2"]], 3.5, 0.1, 0.2, smach_time, "timed_out")
+        rows = read_csv_rows("set.csv")
+        assert rows[0] == INSTANCE_RES_HEADER and len(rows) == 2 and len(rows[1]) == len(INSTANCE_RES_HEADER)
+        res = dict(zip(rows[0], rows[1]))
+        assert res["instance"] == "set_1" and res["status"] == "timed_out" and res["runtime (s)"] == "3.5"
+        assert res["kg_upload (s)"] == "0.2" and float(res["smach (s)"]) >= 3.0
+        assert res["#fault_paths"] == "2" and res["avg_fp_len"] == "1.5"
+        assert all(res[col] == "NaN" for col in ["TP", "acc", "diag_success", "cpu_time (s)", "peak_rss (MB)"])
+        assert read_manifest(EVAL_MANIFEST_FILE) == {"set_1": "abc"}
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Systematically evaluate NeSy diag system with synth. instances.')
-    parser.add_argument('--instances', type=str, required=True)
+    parser.add_argument('--instances', type=str, default=None)
     parser.add_argument('--v', action='store_true', default=False)
     parser.add_argument('--sim', action='store_true', default=False)
+    parser.add_argument('--kg-backend', type=str, choices=['fuseki', 'inprocess'], default='fuseki')
+    parser.add_argument('--named-graphs', action='store_true', default=False)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--resume', action='store_true', default=False)
+    parser.add_argument('--trace', type=str, default=None)  # directory for the state transition traces
+    parser.add_argument('--time-budget', type=float, default=None)  # seconds per instance
+    parser.add_argument('--memory-budget', type=float, default=None)  # MB (RSS) per instance
+    parser.add_argument('--self-test', action='store_true', default=False)
     args = parser.parse_args()
+    if args.self_test:  # tests of resuming and supervision (spawns child processes, allocates 400 MB)
+        test_resume_functionality()
+        test_supervision()
+        print("self-test passed")
+        sys.exit(0)
+    if args.instances is None:
+        parser.error("the following arguments are required: --instances")
+    if args.memory_budget is not None and get_rss(os.getpid()) is None:
+        parser.error("--memory-budget requires the RSS of processes from /proc (Linux only)")
+    if args.trace is not None:  # workers have their own working directories
+        args.trace = os.path.abspath(args.trace)
 
-    for instance in glob.glob(args.instances + "/*.json"):
-        print("working on instance:", instance)
-        start_time = time.time()
-        assert clear_hosted_kg()
-        assert upload_kg_for_instance(instance)
-        seed = instance.split("_")[-2]
-        fault_paths = run_smach(instance, args.v, args.sim, seed)
-
-        # compare to ground truth
-        with open(instance, "r") as f:
-            problem_instance = json.load(f)
-        ground_truth_fault_paths = problem_instance["ground_truth_fault_paths"]
-        ground_truth_components = problem_instance["suspect_components"]
-        diag_success = fault_paths != "no_diag"
-        determined_fault_paths = [path.split(" -> ") for path in fault_paths] if diag_success else []
-
-        if args.v:
-            print("#####################################################################")
-            print("GROUND TRUTH FAULT PATHS:", ground_truth_fault_paths)
-            print("DETERMINED FAULT PATHS:", determined_fault_paths)
-            print("#####################################################################")
-        end_time = time.time()
-        runtime = round(end_time - start_time, 2)
-        evaluate_instance_res(instance, ground_truth_fault_paths, determined_fault_paths, runtime, diag_success)
-        if args.v:
-            for fault_path in fault_paths:
-                print(colored(fault_path, "red", "on_white", ["bold"]))
+    instance_files = list_instances(args.instances)
+    if args.resume:
+        instance_files = get_pending_instances(instance_files)
+    if args.workers is None:
+        evaluate_instances(instance_files, args)
+    else:
+        evaluate_instances_in_parallel(instance_files, args)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+from collections import defaultdict, Counter
+from typing import Dict, List, Iterator, Tuple, Optional
+
+
+def condense_graph(graph: Dict[str, List[str]]) -> Dict[str, int]:
+    """
+    Condenses the graph into its strongly connected components (SCCs) using an iterative version of Tarjan's
+    algorithm, i.e., no recursion limits for large anomaly graphs.
+
+    The SCC ids are assigned in reverse topological order of the condensation, i.e., each SCC is numbered before
+    all SCCs that have an edge into it.
+
+    :param graph: graph (adjacency lists) to be condensed
+    :return: mapping of nodes to SCC ids
+    """
+    nodes = list(dict.fromkeys([n for src in graph for n in [src] + graph[src]]))
+    index = {}
+    low_link = {}
+    stack = []
+    on_stack = set()
+    scc_of = {}
+    num_of_sccs = 0
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low_link[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, [])))]
+        while work:
+            node, successors = work[-1]
+            descended = False
+            for succ in successors:
+                if succ not in index:
+                    index[succ] = low_link[succ] = len(index)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(graph.get(succ, []))))
+                    descended = True
+                    break
+                if succ in on_stack:
+                    low_link[node] = min(low_link[node], index[succ])
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low_link[parent] = min(low_link[parent], low_link[node])
+            if low_link[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    scc_of[member] = num_of_sccs
+                    if member == node:
+                        break
+                num_of_sccs += 1
+    return scc_of
+
+
+def get_predecessors(graph: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    Inverts the adjacency lists of the graph.
+
+    :param graph: graph (adjacency lists) to be inverted
+    :return: predecessor lists
+    """
+    predecessors = defaultdict(list)
+    for src in graph:
+        for dst in graph[src]:
+            predecessors[dst].append(src)
+    return predecessors
+
+
+def iter_maximal_paths(graph: Dict[str, List[str]]) -> Iterator[List[str]]:
+    """
+    Lazily generates all maximal simple paths of the graph, i.e., simple paths that can neither be extended at the
+    beginning nor at the end without revisiting a node.
+
+    These are exactly the paths that survive `find_unique_longest_paths()` after an exhaustive DFS from every node.
+    Instead of enumerating all (sub)paths, the condensation of the graph is used to restrict the DFS:
+        - a maximal path can only start at a node without predecessors outside its own SCC
+        - as soon as a path leaves the SCC of its start node, it can no longer be extended at the beginning, i.e.,
+          non-maximal prefixes are pruned before exploring the remaining DAG
+    The paths are generated in the order in which the exhaustive DFS would find them.
+
+    :param graph: graph (adjacency lists) to find maximal paths in
+    :return: generator of maximal paths
+    """
+    scc_of = condense_graph(graph)
+    predecessors = get_predecessors(graph)
+
+    for start in graph:
+        start_scc = scc_of[start]
+        if any(scc_of[pred] != start_scc for pred in predecessors[start]):
+            continue
+        path = [start]
+        on_path = {start}
+        work = [iter(graph[start])]
+        while work:
+            descended = False
+            for succ in work[-1]:
+                if succ in on_path:
+                    continue
+                if scc_of[succ] != start_scc and not all(pred in on_path for pred in predecessors[start]):
+                    continue  # leaving the SCC of the start node with an extensible beginning
+                path.append(succ)
+                on_path.add(succ)
+                if all(s in on_path for s in graph.get(succ, [])) and all(p in on_path for p in predecessors[start]):
+                    yield list(path)
+                work.append(iter(graph.get(succ, [])))
+                descended = True
+                break
+            if not descended:
+                work.pop()
+                on_path.discard(path.pop())
+
+
+def enumerate_scc_segments(
+        start: str, graph: Dict[str, List[str]], predecessors: Dict[str, List[str]], scc_of: Dict[str, int],
+        max_leaves: Optional[int] = None
+) -> Optional[Dict[Tuple[str, bool, bool], Counter]]:
+    """
+    Enumerates the simple paths (segments) that start at the specified node and stay within its SCC.
+
+    For each segment, it is recorded whether it could be the beginning of a maximal path (all predecessors of the
+    start node within the SCC are part of the segment) and whether it could be the end of a maximal path (all
+    successors of the end node within the SCC are part of the segment, i.e., a leaf of the DFS).
+
+    :param start: start node of the segments
+    :param graph: graph (adjacency lists)
+    :param predecessors: predecessor lists of the graph
+    :param scc_of: mapping of nodes to SCC ids
+    :param max_leaves: max number of leaves before the enumeration is aborted
+    :return: {(end node, start condition satisfied, end condition satisfied): length distribution} or None if aborted
+    """
+    scc = scc_of[start]
+    internal_preds = [p for p in predecessors[start] if scc_of[p] == scc]
+    segments = defaultdict(Counter)
+    num_of_leaves = 0
+    path = [start]
+    on_path = {start}
+    work = [iter(graph.get(start, []))]
+    while True:
+        node = path[-1]
+        start_ok = all(p in on_path for p in internal_preds)
+        end_ok = all(s in on_path for s in graph.get(node, []) if scc_of[s] == scc)
+        segments[(node, start_ok, end_ok)][len(path)] += 1
+        if end_ok:
+            num_of_leaves += 1
+            if max_leaves is not None and num_of_leaves > max_leaves:
+                return None
+        succ = next((s for s in work[-1] if scc_of[s] == scc and s not in on_path), None)
+        while succ is None:
+            work.pop()
+            on_path.discard(path.pop())
+            if not work:
+                return segments
+            succ = next((s for s in work[-1] if scc_of[s] == scc and s not in on_path), None)
+        path.append(succ)
+        on_path.add(succ)
+        work.append(iter(graph.get(succ, [])))
+
+
+def convolve(len_dist_a: Counter, len_dist_b: Counter) -> Counter:
+    """
+    Combines two length distributions of consecutive path parts.
+
+    :param len_dist_a: length distribution of the first part
+    :param len_dist_b: length distribution of the second part
+    :return: length distribution of the combined paths
+    """
+    combined = Counter()
+    for len_a, num_a in len_dist_a.items():
+        for len_b, num_b in len_dist_b.items():
+            combined[len_a + len_b] += num_a * num_b
+    return combined
+
+
+def count_maximal_paths(graph: Dict[str, List[str]], limit: Optional[int] = None) -> Optional[Counter]:
+    """
+    Counts the maximal simple paths of the graph (cf. `iter_maximal_paths()`) without enumerating them, i.e., returns
+    the exact length distribution of the paths.
+
+    A maximal path traverses a chain of SCCs of the condensation, each in one simple segment, and the maximality
+    conditions only concern its first and last segment. Thus, the simple segments are only enumerated within each
+    SCC, and the segments are combined by dynamic programming over the condensation (in reverse topological order).
+    The runtime is polynomial in the size of the condensation and only exponential in the size of the largest SCC
+    (trivial for acyclic anomaly graphs), whereas the number of paths can be exponential in the size of the graph.
+
+    With `limit`, the counting is aborted as soon as the number of paths provably exceeds the limit. This also bounds
+    the segment enumeration in large SCCs: the segments from a node that end in different DFS leaves extend to
+    different maximal paths (by extending the beginning and the end).
+
+    :param graph: graph (adjacency lists) to count maximal paths in
+    :param limit: max number of paths of interest
+    :return: length distribution of the maximal paths, i.e., {length: number of paths}, or None if exceeding the limit
+    """
+    scc_of = condense_graph(graph)
+    predecessors = get_predecessors(graph)
+    external_succs = {
+        node: [s for s in graph.get(node, []) if scc_of[s] != scc_of[node]] for node in scc_of
+    }
+    entry_nodes = {s for node in scc_of for s in external_succs[node]}
+    start_nodes = [n for n in graph if all(scc_of[p] == scc_of[n] for p in predecessors[n])]
+
+    def complete(segments: Dict[Tuple[str, bool, bool], Counter], require_start: bool) -> Counter:
+        len_dist = Counter()
+        for (end, start_ok, end_ok), segment_len_dist in segments.items():
+            if require_start and not start_ok:
+                continue
+            if len(external_succs[end]) == 0:
+                if end_ok:
+                    len_dist.update(segment_len_dist)
+            else:  # a path cannot end at a node with successors outside its SCC
+                for succ in external_succs[end]:
+                    len_dist.update(convolve(segment_len_dist, completions[succ]))
+        return len_dist
+
+    # length distributions of all completions of paths entering an SCC at the respective node
+    # (each completion is part of at least one maximal path -> lower bound for the number of paths)
+    completions = {}
+    # SCC ids are in reverse topological order -> completions of successor SCCs are always available
+    for node in sorted(entry_nodes, key=lambda n: scc_of[n]):
+        segments = enumerate_scc_segments(node, graph, predecessors, scc_of, limit)
+        if segments is None:
+            return None
+        completions[node] = complete(segments, False)
+        if limit is not None and sum(completions[node].values()) > limit:
+            return None
+
+    len_dist = Counter()
+    num_of_paths = 0
+    for start in start_nodes:
+        # extended at the beginning, the segments of different start nodes might correspond to the same paths
+        segments = enumerate_scc_segments(start, graph, predecessors, scc_of, limit)
+        if segments is None:
+            return None
+        start_len_dist = complete(segments, True)
+        len_dist.update(start_len_dist)
+        num_of_paths += sum(start_len_dist.values())
+        if limit is not None and num_of_paths > limit:
+            return None
+    return len_dist
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Tuple, TypeVar
+
+from instance_gen import (
+    create_arg_parser, generate_component_network, count_ground_truth_fault_paths, generate_ground_truth_fault_paths,
+    randomly_gen_error_codes_with_fault_cond_and_suspect_components, write_instance_to_file, get_fault_path_stats
+)
+from kg_serializer import write_instance_kg_to_file
+
+T = TypeVar("T")
+CSV_HEADER = [
+    "num_of_comp", "anomaly_percentage", "affected_by_ub_percentage", "repetition", "stage", "runtime (s)",
+    "peak_mem (bytes)", "#anomalies", "#fault_paths", "status"
+]
+
+
+def run_stage(stage: Callable[[], T], trace_memory: bool) -> Tuple[T, float, int]:
+    """
+    Runs a stage of the instance generation and measures its runtime or peak memory.
+
+    The memory is traced in a separate run, since tracing considerably slows down the (allocation-heavy) stages.
+
+    :param stage: stage to be run
+    :param trace_memory: whether the peak memory should be traced
+    :return: (result of the stage, runtime in seconds, peak memory in bytes (0 if not traced))
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    res = stage()
+    runtime = time.perf_counter() - start
+    peak_mem = 0
+    if trace_memory:
+        peak_mem = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return res, runtime, peak_mem
+
+
+def benchmark_instance(
+        config: argparse.Namespace, repetition: int, trace_memory: bool
+) -> List[Tuple[str, float, int, int, int, str]]:
+    """
+    Generates a problem instance stage by stage and measures each stage.
+
+    The instance is generated in the current working directory (`instances/`) from the random number stream of
+    `(seed, repetition)`, i.e., the timed and the traced run generate the same instance.
+
+    :param config: config of the instance generation, i.e., parameters
+    :param repetition: repetition (instance index)
+    :param trace_memory: whether the peak memory should be traced (instead of timing the stages)
+    :return: [(stage, runtime, peak memory, number of anomalies, number of fault paths, status)]
+    """
+    rng = random.Random(str(config.seed) + "_" + str(repetition))
+    measurements = []
+    sus_comp, runtime, peak_mem = run_stage(lambda: generate_component_network(config, rng), trace_memory)
+    num_of_anomalies = sum(1 for comp in sus_comp if sus_comp[comp][0])
+    measurements.append(["network", runtime, peak_mem])
+
+    fault_path_len_dist, runtime, peak_mem = run_stage(
+        lambda: count_ground_truth_fault_paths(sus_comp, config.max_fault_paths), trace_memory
+    )
+    measurements.append(["fault_path_count", runtime, peak_mem])
+    if fault_path_len_dist is None:  # too many fault paths -- the remaining stages would not terminate in time
+        return [(stage, runtime, peak_mem, num_of_anomalies, -1, "exceeds_max_fault_paths")
+                for stage, runtime, peak_mem in measurements]
+    num_of_fault_paths = sum(fault_path_len_dist.values())
+
+    fault_paths, runtime, peak_mem = run_stage(lambda: generate_ground_truth_fault_paths(sus_comp), trace_memory)
+    measurements.append(["fault_paths", runtime, peak_mem])
+    errors, runtime, peak_mem = run_stage(
+        lambda: randomly_gen_error_codes_with_fault_cond_and_suspect_components(
+            fault_paths, list(sus_comp.keys()), config.fault_path_comp_ub_percentage,
+            config.distractor_ub_percentage, rng
+        ), trace_memory
+    )
+    measurements.append(["error_codes", runtime, peak_mem])
+    filename, runtime, peak_mem = run_stage(
+        lambda: write_instance_to_file(
+            sus_comp, fault_paths, errors, config.seed, config.anomaly_percentage, config.affected_by_ub_percentage,
+            config.fault_path_comp_ub_percentage, config.distractor_ub_percentage, repetition, [],
+            config.model_acc_lb, config.model_acc_ub, config.instance_format, get_fault_path_stats(fault_path_len_dist)
+        ), trace_memory
+    )
+    measurements.append(["serialization", runtime, peak_mem])
+    _, runtime, peak_mem = run_stage(
+        lambda: write_instance_kg_to_file(sus_comp, errors, "instances/" + filename + ".nt"), trace_memory
+    )
+    measurements.append(["kg_export", runtime, peak_mem])
+    return [(stage, runtime, peak_mem, num_of_anomalies, num_of_fault_paths, "ok")
+            for stage, runtime, peak_mem in measurements]
+
+
+def benchmark_config(config: argparse.Namespace, repetitions: int) -> List[List]:
+    """
+    Benchmarks the instance generation for the specified config.
+
+    :param config: config of the instance generation, i.e., parameters
+    :param repetitions: number of generated instances
+    :return: CSV rows (one per stage and repetition)
+    """
+    rows = []
+    for rep in range(repetitions):
+        timed = benchmark_instance(config, rep, False)
+        traced = benchmark_instance(config, rep, True)
+        for (stage, runtime, _, num_of_anomalies, num_of_fault_paths, status), traced_stage in zip(timed, traced):
+            rows.append([
+                config.components, config.anomaly_percentage, config.affected_by_ub_percentage, rep, stage, runtime,
+                traced_stage[2], num_of_anomalies, num_of_fault_paths, status
+            ])
+    return rows
+
+
+def run_benchmark(args: argparse.Namespace) -> None:
+    """
+    Benchmarks the instance generation for the entire grid of C / alpha / beta values and writes the results to a
+    CSV file (appended, i.e., results of different code versions can be collected in one file).
+
+    :param args: arguments of the benchmark
+    """
+    out_file = os.path.abspath(args.out)
+    file_exists = os.path.isfile(out_file)
+    with open(out_file, mode='a', newline='') as csv_file, tempfile.TemporaryDirectory() as tmp_dir:
+        writer = csv.writer(csv_file)
+        if not file_exists:
+            writer.writerow(CSV_HEADER)
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)  # generated files are only written to measure the serialization
+        try:
+            for num_of_comp, alpha, beta in itertools.product(args.components, args.alphas, args.betas):
+                config = create_arg_parser().parse_args([])
+                config.seed = args.seed
+                config.components = num_of_comp
+                config.anomaly_percentage = alpha
+                config.affected_by_ub_percentage = beta
+                config.vectorized_network = args.vectorized_network
+                config.instance_format = args.instance_format
+                config.max_fault_paths = args.max_fault_paths
+                print("benchmarking C =", num_of_comp, "alpha =", alpha, "beta =", beta)
+                writer.writerows(benchmark_config(config, args.repetitions))
+                csv_file.flush()
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the stages of the instance generation.')
+    parser.add_argument('--components', type=int, nargs='+', default=[129])
+    parser.add_argument('--alphas', type=float, nargs='+', default=[0.05, 0.1, 0.2])
+    parser.add_argument('--betas', type=float, nargs='+', default=[0.05, 0.1, 0.2])
+    parser.add_argument('--repetitions', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--vectorized-network', action='store_true', default=False)
+    parser.add_argument('--instance-format', type=str, choices=['json', 'npz'], default='json')
+    parser.add_argument('--max-fault-paths', type=int, default=100000)
+    parser.add_argument('--out', type=str, default="gen_benchmark.csv")
+    run_benchmark(parser.parse_args())
@@ -7,65 +7,94 @@ import json
 import os
 import random
 import shutil
-from collections import defaultdict
-from typing import Dict, Tuple, List
-
-import requests
+import tempfile
+import zipfile
+from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, redirect_stderr
+from itertools import repeat
+from typing import Dict, Tuple, List, Iterator, Optional
+
+import numpy as np
 from nesy_diag_ontology.expert_knowledge_enhancer import ExpertKnowledgeEnhancer
 
-from config import BACKUP_URL, UPDATE_ENDPOINT
+from config import BACKUP_URL
+from fault_paths import iter_maximal_paths, count_maximal_paths
+from instance_io import (
+    write_instance_npz, move_instance_to_archive, ProblemInstance, ARCHIVE_EXTENSION, KG_EXTENSION,
+    COMPRESSED_KG_EXTENSION, export_instance_to_json, load_problem_instance
+)
+from kg_serializer import write_instance_kg_to_file, gen_instance_triples
+from kg_transport import upload_to_kg, download_kg, sparql_update
+
+MAX_RESAMPLING_ATTEMPTS = 100
+
+
+def get_nth_non_excluded_index(n: int, excluded: List[int]) -> int:
+    """
+    Determines the n-th index (0-based) that is not part of the excluded indices, i.e., maps an index of the
+    remaining index set to the original index set without materializing the remaining set.
+
+    :param n: index in the remaining index set
+    :param excluded: sorted excluded indices
+    :return: corresponding index in the original index set
+    """
+    idx = n
+    for e in excluded:
+        if e > idx:
+            break
+        idx += 1
+    return idx
 
 
 def randomly_gen_error_codes_with_fault_cond_and_suspect_components(
         ground_truth_fault_paths: List[List[str]], components: List[str], fault_path_comp_ub_percentage: float,
-        distractor_ub_percentage: float
+        distractor_ub_percentage: float, rng: random.Random
 ) -> Dict[str, Tuple[str, List[str]]]:
     """
     Randomly generates error codes with fault conditions and suspect components.
 
+    All components are sampled without replacement from index sets, i.e., without rejection loops.
+
     :param ground_truth_fault_paths: ground truth fault paths to generate errors for
     :param components: list of suspect components
     :param fault_path_comp_ub_percentage: UB for fault path component percentage
     :param distractor_ub_percentage: UB percentage for distractors
+    :param rng: random number generator (stream) to be used
     :return: {error_code: (fault_cond, suspect_components)}
     """
+    comp_ids = {comp: i for i, comp in enumerate(components)}
     error_codes = {}
     # we need as many random error codes as we have ground truth fault paths (assuming no duplicates)
     for i in range(len(ground_truth_fault_paths)):
+        fault_path = ground_truth_fault_paths[i]
         # gen diag associations - each code should have a number [1, n] random associated components from the
         # corresponding ground truth fault path
-        ub = int(fault_path_comp_ub_percentage * len(ground_truth_fault_paths[i]))
-        if len(ground_truth_fault_paths[i]) == 1 or ub in [0, 1]:
+        ub = int(fault_path_comp_ub_percentage * len(fault_path))
+        if len(fault_path) == 1 or ub in [0, 1]:
             num_of_fault_path_comp = 1
         else:
-            num_of_fault_path_comp = random.randint(1, ub)
-        sus_components = []
-        for j in range(num_of_fault_path_comp):
-            # the first one always has to be the "anti-root-cause" so that all components are reachable via affected-by
-            if j == 0:
-                # the "anti-root-cause", the beginning of the "affected-by chain"
-                r = len(ground_truth_fault_paths[i]) - 1
-            else:
-                r = random.randint(0, len(ground_truth_fault_paths[i]) - 1)
-                while ground_truth_fault_paths[i][r] in sus_components:
-                    r = random.randint(0, len(ground_truth_fault_paths[i]) - 1)
-            sus_components.append(ground_truth_fault_paths[i][r])
+            num_of_fault_path_comp = rng.randint(1, ub)
+        # the first one always has to be the "anti-root-cause" so that all components are reachable via affected-by,
+        # i.e., the beginning of the "affected-by chain" -- the others are sampled from the rest of the fault path
+        sus_components = [fault_path[-1]] + [
+            fault_path[r] for r in rng.sample(range(len(fault_path) - 1), num_of_fault_path_comp - 1)
+        ]
 
         # also add some "distractors", i.e., include some suspect components that are not part of the fault path
-        num_of_distractors = random.randint(
+        num_of_distractors = rng.randint(
             1, int(distractor_ub_percentage * (len(components) - len(sus_components) - 1))
         )
-        for j in range(num_of_distractors):
-            r = random.randint(0, len(components) - 1)
-            while components[r] in sus_components:
-                r = random.randint(0, len(components) - 1)
-            sus_components.append(components[r])
+        # sampled from the indices of the remaining components
+        excluded = sorted(comp_ids[comp] for comp in sus_components)
+        for r in rng.sample(range(len(components) - len(excluded)), num_of_distractors):
+            sus_components.append(components[get_nth_non_excluded_index(r, excluded)])
         error_codes["E" + str(i)] = ("FC" + str(i), sus_components)
     return error_codes
 
 
 def randomly_gen_suspect_components_with_affected_by_relations_and_anomalies(
-        num_of_comp: int, percentage_of_anomalies: float, affected_by_ub_percentage: float
+        num_of_comp: int, percentage_of_anomalies: float, affected_by_ub_percentage: float, rng: random.Random
 ) -> Dict[str, Tuple[bool, List[str]]]:
     """
     Randomly generates suspect components with affected-by relations and anomalies.
@@ -73,6 +102,7 @@ def randomly_gen_suspect_components_with_affected_by_relations_and_anomalies(
     :param num_of_comp: number of components
     :param percentage_of_anomalies: fraction of components with anomalies
     :param affected_by_ub_percentage: UB percentage for affected-by relations per component
+    :param rng: random number generator (stream) to be used
     :return: {component: (anomaly, affected-by list)}
     """
     suspect_components = {}
@@ -83,30 +113,73 @@ def randomly_gen_suspect_components_with_affected_by_relations_and_anomalies(
 
     # gen anomalies
     num_elements = round(num_of_comp * percentage_of_anomalies)
-    selected_elements = random.sample(suspect_components.keys(), num_elements)
+    selected_elements = rng.sample(list(suspect_components.keys()), num_elements)
 
     # gen affected_by - each comp should have a number [0, min(n-1, config_param)] random affected_by relations
     for i in range(num_of_comp):
-        rand_num = random.randint(0, min(num_of_comp - 1, int(affected_by_ub_percentage * num_of_comp)))
+        rand_num = rng.randint(0, min(num_of_comp - 1, int(affected_by_ub_percentage * num_of_comp)))
         affected_by_relations = []
         for j in range(rand_num):
-            r = random.randint(0, num_of_comp - 1)
+            r = rng.randint(0, num_of_comp - 1)
             while r == i or "C" + str(r) in affected_by_relations:
-                r = random.randint(0, num_of_comp - 1)
+                r = rng.randint(0, num_of_comp - 1)
             affected_by_relations.append("C" + str(r))
         suspect_components["C" + str(i)] = ("C" + str(i) in selected_elements, affected_by_relations)
     return suspect_components
 
 
+def randomly_gen_suspect_components_with_affected_by_relations_and_anomalies_vectorized(
+        num_of_comp: int, percentage_of_anomalies: float, affected_by_ub_percentage: float, rng: random.Random
+) -> Dict[str, Tuple[bool, List[str]]]:
+    """
+    Randomly generates suspect components with affected-by relations and anomalies (NumPy-backed version of
+    `randomly_gen_suspect_components_with_affected_by_relations_and_anomalies()` for very large numbers of components).
+
+    Same distribution, but without rejection loops: the number of relations of all components is drawn at once, the
+    relations of each component are sampled without replacement from the other components, and the anomalies are
+    marked in a boolean array.
+
+    :param num_of_comp: number of components
+    :param percentage_of_anomalies: fraction of components with anomalies
+    :param affected_by_ub_percentage: UB percentage for affected-by relations per component
+    :param rng: random number generator (stream) to be used (seeds the NumPy generator)
+    :return: {component: (anomaly, affected-by list)}
+    """
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    comp_names = ["C" + str(i) for i in range(num_of_comp)]
+
+    # gen anomalies
+    anomalies = np.zeros(num_of_comp, dtype=bool)
+    anomalies[np_rng.choice(num_of_comp, size=round(num_of_comp * percentage_of_anomalies), replace=False)] = True
+
+    # gen affected_by - each comp should have a number [0, min(n-1, config_param)] random affected_by relations
+    ub = min(num_of_comp - 1, int(affected_by_ub_percentage * num_of_comp))
+    num_of_relations = np_rng.integers(0, ub, size=num_of_comp, endpoint=True)
+    suspect_components = {}
+    for i in range(num_of_comp):
+        # sample from the n-1 other components -> skip the component itself by shifting the upper part
+        affected_by = np_rng.choice(num_of_comp - 1, size=num_of_relations[i], replace=False)
+        affected_by[affected_by >= i] += 1
+        suspect_components[comp_names[i]] = (bool(anomalies[i]), [comp_names[j] for j in affected_by])
+    return suspect_components
+
+
 def add_generated_instance_to_kg(
-        suspect_components: Dict[str, Tuple[bool, List[str]]], error_codes: Dict[str, Tuple[str, List[str]]]
+        suspect_components: Dict[str, Tuple[bool, List[str]]], error_codes: Dict[str, Tuple[str, List[str]]],
+        batched: bool = False
 ) -> None:
     """
     Adds the generated problem instance to the KG.
 
     :param suspect_components: suspect components
     :param error_codes: error codes
+    :param batched: whether all triples of the instance should be uploaded in a single (chunked) request instead of
+                    one update per component / error code via the `ExpertKnowledgeEnhancer`
     """
+    if batched:
+        assert upload_instance_triples_to_kg(suspect_components, error_codes)
+        return
+
     expert_knowledge_enhancer = ExpertKnowledgeEnhancer(verbose=False)
 
     for k in suspect_components.keys():
@@ -125,11 +198,55 @@ def add_generated_instance_to_kg(
         expert_knowledge_enhancer.add_error_code_to_knowledge_graph(code, fault_cond, associated_comps)
 
 
+def upload_instance_triples_to_kg(
+        suspect_components: Dict[str, Tuple[bool, List[str]]], error_codes: Dict[str, Tuple[str, List[str]]]
+) -> bool:
+    """
+    Uploads all triples of the problem instance to the hosted KG in one transaction, i.e., a single request to the
+    data endpoint streamed with chunked transfer encoding.
+
+    :param suspect_components: suspect components
+    :param error_codes: error codes
+    :return: whether the triples were successfully uploaded
+    """
+    resp = upload_to_kg(lambda: (t.encode("utf-8") for t in gen_instance_triples(suspect_components, error_codes)))
+    if resp.status_code == 200:
+        return True
+    print("failed to upload instance triples:", resp.status_code, resp.text)
+    return False
+
+
+def get_instance_set_name(
+        num_of_comp: int, anomaly_percentage: float, affected_by_ub: float, fault_path_comp_ub: float,
+        distractor_ub: float, model_acc_lb: float, model_acc_ub: float, seed: int
+) -> str:
+    """
+    Creates the name of an instance set, i.e., the common prefix of all its instances.
+
+    :param num_of_comp: number of components
+    :param anomaly_percentage: fraction of components with anomalies
+    :param affected_by_ub: UB for the affected-by relations of each component
+    :param fault_path_comp_ub: UB for the fault path components
+    :param distractor_ub: UB for distractors
+    :param model_acc_lb: LB for model accuracy
+    :param model_acc_ub: UB for model accuracy
+    :param seed: seed for random processes
+    :return: instance set name
+    """
+    # naming scheme:
+    # <comp>_<ano_perc>_<affected_by_ub>_<fp_comp_ub>_<distractor_ub>_<model_acc_lb>_<model_acc_ub>_<seed>_<idx>.json
+    return (str(num_of_comp) + "_"
+            + str(int(anomaly_percentage * 100)) + "_" + str(int(affected_by_ub * 100)) + "_"
+            + str(int(fault_path_comp_ub * 100)) + "_" + str(int(distractor_ub * 100)) + "_"
+            + str(int(model_acc_lb * 100)) + "_" + str(int(model_acc_ub * 100)) + "_"
+            + str(seed))
+
+
 def write_instance_to_file(
         suspect_components: Dict[str, Tuple[bool, List[str]]], ground_truth_fault_paths: List[List[str]],
         error_codes: Dict[str, Tuple[str, List[str]]], seed: int, anomaly_percentage: float, affected_by_ub: float,
         fault_path_comp_ub: float, distractor_ub: float, idx: int, sim_accuracies: Dict[str, Tuple[str, str]],
-        model_acc_lb: float, model_acc_ub: float
+        model_acc_lb: float, model_acc_ub: float, instance_format: str = "json", fault_path_stats: Dict = None
 ) -> str:
     """
     Writes the problem instance to file.
@@ -146,6 +263,9 @@ def write_instance_to_file(
     :param sim_accuracies: simulated accuracies for components
     :param model_acc_lb: LB for model accuracy
     :param model_acc_ub: UB for model accuracy
+    :param instance_format: file format of the instance, "json" or "npz" (compact binary format)
+    :param fault_path_stats: number and length distribution of the ground truth fault paths (cf.
+                             `get_fault_path_stats()`)
     :return: filename
     """
     data = {
@@ -154,17 +274,22 @@ def write_instance_to_file(
         "error_codes": error_codes,
         "sim_accuracies": sim_accuracies
     }
-    # naming scheme:
-    # <comp>_<ano_perc>_<affected_by_ub>_<fp_comp_ub>_<distractor_ub>_<model_acc_lb>_<model_acc_ub>_<seed>_<idx>.json
-    filename = (str(len(suspect_components.keys())) + "_"
-                + str(int(anomaly_percentage * 100)) + "_" + str(int(affected_by_ub * 100)) + "_"
-                + str(int(fault_path_comp_ub * 100)) + "_" + str(int(distractor_ub * 100)) + "_"
-                + str(int(model_acc_lb * 100)) + "_" + str(int(model_acc_ub * 100)) + "_"
-                + str(seed) + "_" + str(idx))
+    if fault_path_stats is not None:
+        data["fault_path_stats"] = fault_path_stats
+    filename = get_instance_set_name(
+        len(suspect_components.keys()), anomaly_percentage, affected_by_ub, fault_path_comp_ub, distractor_ub,
+        model_acc_lb, model_acc_ub, seed
+    ) + "_" + str(idx)
 
     os.makedirs("instances", exist_ok=True)
-    with open("instances/" + filename + ".json", "w") as f:
-        json.dump(data, f, indent=4, default=str)
+    if instance_format == "npz":
+        write_instance_npz(
+            "instances/" + filename + ".npz", suspect_components, ground_truth_fault_paths, error_codes, sim_accuracies,
+            fault_path_stats
+        )
+    else:
+        with open("instances/" + filename + ".json", "w") as f:
+            json.dump(data, f, indent=4, default=str)
     return filename
 
 
@@ -205,51 +330,121 @@ def find_unique_longest_paths(paths: List[List[str]]) -> List[List[str]]:
     """
     Extracts the unique longest paths from the list of identified paths.
 
+    A path is dropped if it is a contiguous sub-path of an already kept (longer or equally long) path. Since the paths
+    are processed in order of decreasing length, it suffices to index all windows of the current length of the kept
+    paths (as tuples of integer component ids) -- each containment check is a single hash lookup.
+
     :param paths: identified paths to find unique longest paths in
     :return: unique longest paths
     """
+    comp_ids = {}
     unique_paths = []
-    paths_sorted = sorted(paths, key=len, reverse=True)
-    for path in paths_sorted:
-        if not any("-" + "-".join(list(path)) + "-" in "-" + "-".join(up) + "-" for up in unique_paths):
+    unique_id_paths = []
+    window_len = None
+    windows = set()
+    for path in sorted(paths, key=len, reverse=True):
+        id_path = tuple(comp_ids.setdefault(comp, len(comp_ids)) for comp in path)
+        if len(id_path) != window_len:  # re-index kept paths for the new (shorter) window length
+            window_len = len(id_path)
+            windows = {p[i:i + window_len] for p in unique_id_paths for i in range(len(p) - window_len + 1)}
+        if id_path not in windows:
             unique_paths.append(list(path))
+            unique_id_paths.append(id_path)
+            windows.update(id_path[i:i + window_len] for i in range(len(id_path) - window_len + 1))
     return unique_paths
 
 
-def generate_ground_truth_fault_paths(component_net: Dict[str, Tuple[bool, List[str]]]) -> List[List[str]]:
+def build_anomaly_graph(component_net: Dict[str, Tuple[bool, List[str]]]) -> Tuple[Dict[str, List[str]], List[str]]:
     """
-    Generates the ground truth fault paths based on the component network.
+    Builds the anomaly graph, i.e., the graph of affected-by relations between anomalous components.
 
     :param component_net: component network, i.e., mapping of components to states and affected-by relations
-    :return: ground truth fault paths
+    :return: (anomaly graph (adjacency lists), anomalous components that are not part of any edge)
     """
     anomalous_components = [k for k in component_net.keys() if component_net[k][0]]
+    anomalous_component_set = set(anomalous_components)
 
     # finding all anomalous affecting components for all anomalous components,
     # those are the edges in the final fault paths
     edges = []
     for anomaly in anomalous_components:
         for aff_by in component_net[anomaly][1]:
-            if aff_by in anomalous_components:
-                edges.append(aff_by + " -> " + anomaly)
+            if aff_by in anomalous_component_set:
+                edges.append((aff_by, anomaly))
 
     edges = edges[::-1]  # has to be reversed, affected-by direction
     # create adjacency lists
     anomaly_graph = defaultdict(list)
-    for edge in edges:
-        start, end = edge.split(' -> ')
+    edge_components = set()
+    for start, end in edges:
         anomaly_graph[start].append(end)
+        edge_components.update((start, end))
+    isolated_anomalies = [anomaly for anomaly in anomalous_components if anomaly not in edge_components]
+    return anomaly_graph, isolated_anomalies
+
+
+def generate_ground_truth_fault_paths(component_net: Dict[str, Tuple[bool, List[str]]]) -> List[List[str]]:
+    """
+    Generates the ground truth fault paths based on the component network.
 
-    fault_paths = find_all_longest_paths(anomaly_graph)
+    The maximal paths are generated lazily from the condensation of the anomaly graph (cf. `fault_paths.py`) instead
+    of enumerating all paths from every node and filtering the longest ones afterwards (`find_all_longest_paths()`),
+    which is exponential in time and memory for highly connected anomaly graphs.
+
+    :param component_net: component network, i.e., mapping of components to states and affected-by relations
+    :return: ground truth fault paths
+    """
+    anomaly_graph, isolated_anomalies = build_anomaly_graph(component_net)
+    # stable sort -> same order as `find_unique_longest_paths()`
+    fault_paths = sorted(iter_maximal_paths(anomaly_graph), key=len, reverse=True)
 
     # handle one-component-paths
-    for anomaly in anomalous_components:
-        edge_comp = "-" + "-".join(["-".join(edge.split(" -> ")) for edge in edges]) + "-"
-        if "-" + anomaly + "-" not in edge_comp:
-            fault_paths.append([anomaly])
+    fault_paths.extend([anomaly] for anomaly in isolated_anomalies)
     return fault_paths
 
 
+def count_ground_truth_fault_paths(
+        component_net: Dict[str, Tuple[bool, List[str]]], limit: int = None
+) -> Optional[Counter]:
+    """
+    Counts the ground truth fault paths of the component network without generating them (cf.
+    `fault_paths.count_maximal_paths()`), i.e., cheap enough to check each generated network before the (potentially
+    exponential) fault path generation.
+
+    :param component_net: component network, i.e., mapping of components to states and affected-by relations
+    :param limit: max number of fault paths of interest
+    :return: length distribution of the ground truth fault paths, i.e., {length: number of fault paths}, or None if
+             exceeding the limit
+    """
+    anomaly_graph, isolated_anomalies = build_anomaly_graph(component_net)
+    if limit is not None:
+        limit -= len(isolated_anomalies)
+        if limit < 0:
+            return None
+    fault_path_len_dist = count_maximal_paths(anomaly_graph, limit)
+    if fault_path_len_dist is not None and len(isolated_anomalies) > 0:
+        fault_path_len_dist[1] += len(isolated_anomalies)
+    return fault_path_len_dist
+
+
+def get_fault_path_stats(fault_path_len_dist: Optional[Counter]) -> Dict:
+    """
+    Summarizes the length distribution of the ground truth fault paths for the instance file.
+
+    :param fault_path_len_dist: length distribution of the ground truth fault paths (None -> exceeds the specified
+                                max number of fault paths, i.e., neither counted completely nor generated)
+    :return: fault path stats
+    """
+    if fault_path_len_dist is None:
+        return {"num_of_fault_paths": None, "fault_path_len_distribution": {}, "exceeds_max_fault_paths": True}
+    return {
+        "num_of_fault_paths": sum(fault_path_len_dist.values()),
+        # str keys -> same representation as in the JSON files
+        "fault_path_len_distribution": {str(k): fault_path_len_dist[k] for k in sorted(fault_path_len_dist)},
+        "exceeds_max_fault_paths": False
+    }
+
+
 def test_branching_fault_path_instance_one() -> None:
     """
     Tests for the expected behavior with branching fault paths -- instance one.
@@ -414,18 +609,159 @@ def test_complex_case() -> None:
     assert ground_truth_fault_paths[0] == ['C0011', 'C0012', 'C0007', 'C0004', 'C0002', 'C0001']
 
 
-def create_kg_file_for_generated_instance(filename: str) -> None:
+def test_maximal_path_engine_matches_exhaustive_enumeration() -> None:
+    """
+    Tests that the maximal path engine yields exactly the fault paths of the exhaustive enumeration (same order) for
+    random, potentially cyclic, component networks.
     """
-    Creates the KG file for a generated instance (.nt).
+    rng = random.Random(0)
+    for _ in range(300):
+        num_of_comp = rng.randint(2, 14)
+        comp_names = ["C" + str(i) for i in range(num_of_comp)]
+        component_net = {
+            comp: (
+                rng.random() < 0.6,
+                rng.sample([c for c in comp_names if c != comp], rng.randint(0, min(3, num_of_comp - 1)))
+            ) for comp in comp_names
+        }
+        anomaly_graph, isolated_anomalies = build_anomaly_graph(component_net)
+        expected_fault_paths = find_all_longest_paths(anomaly_graph) + [[anomaly] for anomaly in isolated_anomalies]
+        assert generate_ground_truth_fault_paths(component_net) == expected_fault_paths
+
+
+def test_error_code_generation() -> None:
+    """
+    Tests the invariants of the error code generation: the "anti-root-cause" of the fault path is always the first
+    suspect component, the suspect components are unique, and there is at least one distractor.
+    """
+    rng = random.Random(0)
+    components = ["C" + str(i) for i in range(20)]
+    fault_paths = [["C3", "C7", "C1", "C9", "C4"], ["C5"], ["C0", "C19"], ["C12", "C2", "C6"]]
+    for _ in range(200):
+        error_codes = randomly_gen_error_codes_with_fault_cond_and_suspect_components(
+            fault_paths, components, 0.8, 0.5, rng
+        )
+        assert list(error_codes.keys()) == ["E0", "E1", "E2", "E3"]
+        for i, fault_path in enumerate(fault_paths):
+            fault_cond, sus_components = error_codes["E" + str(i)]
+            assert fault_cond == "FC" + str(i)
+            assert sus_components[0] == fault_path[-1]
+            assert len(set(sus_components)) == len(sus_components)
+            assert all(c in components for c in sus_components)
+            assert len(sus_components) >= 2
+
+
+def test_fault_path_counting_matches_enumeration() -> None:
+    """
+    Tests that the counted length distribution of the ground truth fault paths equals the one of the generated fault
+    paths for random, potentially cyclic, component networks.
+    """
+    rng = random.Random(1)
+    for _ in range(300):
+        num_of_comp = rng.randint(2, 16)
+        comp_names = ["C" + str(i) for i in range(num_of_comp)]
+        component_net = {
+            comp: (
+                rng.random() < 0.7,
+                rng.sample([c for c in comp_names if c != comp], rng.randint(0, min(3, num_of_comp - 1)))
+            ) for comp in comp_names
+        }
+        fault_paths = generate_ground_truth_fault_paths(component_net)
+        assert count_ground_truth_fault_paths(component_net) == Counter(len(fp) for fp in fault_paths)
+
+
+def test_vectorized_network_generation() -> None:
+    """
+    Tests the invariants of the component networks generated by the vectorized generator for seeded runs, i.e., no
+    self-relations, no duplicate relations, exact number of anomalies, number of relations within the bounds and
+    reproducibility.
+    """
+    for num_of_comp, anomaly_percentage, affected_by_ub_percentage in [
+        (1, 1.0, 0.5), (2, 0.5, 1.0), (10, 0.2, 0.4), (129, 0.1, 0.2), (500, 0.35, 0.05), (40, 0.0, 0.0)
+    ]:
+        ub = min(num_of_comp - 1, int(affected_by_ub_percentage * num_of_comp))
+        for seed in range(5):
+            sus_comp = randomly_gen_suspect_components_with_affected_by_relations_and_anomalies_vectorized(
+                num_of_comp, anomaly_percentage, affected_by_ub_percentage, random.Random(seed)
+            )
+            assert list(sus_comp.keys()) == ["C" + str(i) for i in range(num_of_comp)]
+            assert sum(anomaly for anomaly, _ in sus_comp.values()) == round(num_of_comp * anomaly_percentage)
+            for comp, (_, affected_by) in sus_comp.items():
+                assert comp not in affected_by and len(set(affected_by)) == len(affected_by)
+                assert set(affected_by) <= sus_comp.keys() and 0 <= len(affected_by) <= ub
+            assert sus_comp == randomly_gen_suspect_components_with_affected_by_relations_and_anomalies_vectorized(
+                num_of_comp, anomaly_percentage, affected_by_ub_percentage, random.Random(seed)
+            )
+
+
+def test_fault_path_guard_flag() -> None:
+    """
+    Tests that instances exceeding the max number of fault paths are flagged without generating their fault paths.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            os.makedirs("instances")
+            for instance_format in ["json", "npz"]:
+                args = create_arg_parser().parse_args([
+                    "--components", "40", "--anomaly-percentage", "0.5", "--affected-by-ub-percentage", "0.3",
+                    "--max-fault-paths", "1", "--fault-path-guard", "flag", "--instance-format", instance_format
+                ])
+                filename = generate_instance(args, 0, random.Random(args.seed))
+                instance = ProblemInstance.load("instances/" + filename + "." + instance_format)
+                assert instance.exceeds_max_fault_paths
+                assert instance.ground_truth_fault_paths == () and len(instance.error_codes) == 0
+        finally:
+            os.chdir(cwd)
+
+
+def test_export_archived_instance() -> None:
+    """
+    Tests the JSON export of a problem instance stored in an instance set archive.
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            os.makedirs("instances")
+            args = create_arg_parser().parse_args(["--components", "10", "--instance-format", "npz"])
+            filename = generate_instance(args, 0, random.Random(args.seed))
+            with zipfile.ZipFile("instances/set" + ARCHIVE_EXTENSION, "w") as archive:
+                move_instance_to_archive(archive, "instances", filename)
+            archived_instance = "instances/set" + ARCHIVE_EXTENSION + "/" + filename + ".npz"
+            json_file = export_instance_to_json(archived_instance)
+            assert json_file == os.path.join("instances", "set", filename + ".json")
+            with open(json_file) as f:
+                assert json.load(f) == json.loads(json.dumps(load_problem_instance(archived_instance), default=str))
+        finally:
+            os.chdir(cwd)
+
+
+def test_workers_validation() -> None:
+    """
+    Tests that the number of workers is rejected unless it is a positive integer.
+    """
+    assert create_arg_parser().parse_args(["--workers", "1"]).workers == 1
+    for workers in ["0", "-2"]:
+        try:
+            with open(os.devnull, "w") as devnull, redirect_stderr(devnull):
+                create_arg_parser().parse_args(["--workers", workers])
+        except SystemExit:
+            continue
+        assert False, "--workers " + workers + " not rejected"
+
+
+def create_kg_file_for_generated_instance(filename: str, kg_extension: str = KG_EXTENSION) -> None:
+    """
+    Creates the KG file for a generated instance (.nt or compressed .nt.gz).
 
     :param filename: instance name
+    :param kg_extension: extension of the KG file
     """
-    # create KG file (.nt) - perform backup and compress result using gzip
-    response = requests.get(BACKUP_URL, headers={"Accept": "application/n-triples"})
-    if response.status_code == 200:
-        with open("instances/" + filename + ".nt", "wb") as f:
-            f.write(response.content)
-    else:
+    # create KG file (.nt) - perform backup (streamed)
+    response = download_kg(BACKUP_URL, "instances/" + filename + kg_extension)
+    if response.status_code != 200:
         print(f"HTTP status: {response.status_code}")
 
 
@@ -441,7 +777,7 @@ def clear_hosted_kg() -> bool:
             ?s ?p ?o .
         }
     """
-    resp = requests.post(UPDATE_ENDPOINT, data={"update": clear_query})
+    resp = sparql_update(clear_query)
     if resp.status_code == 200:
         print("dataset successfully cleared..")
         # get home dir in platform-independent way
@@ -467,42 +803,187 @@ def test_basic_functionality() -> None:
     test_simple_two_fault_paths()
     test_several_fault_paths()
     test_complex_case()
+    test_maximal_path_engine_matches_exhaustive_enumeration()
+    test_error_code_generation()
+    test_fault_path_counting_matches_enumeration()
+    test_vectorized_network_generation()
+    test_fault_path_guard_flag()
+    test_export_archived_instance()
+    test_workers_validation()
 
 
-def generate_instance(args: argparse.Namespace, idx: int) -> None:
+def generate_component_network(args: argparse.Namespace, rng: random.Random) -> Dict[str, Tuple[bool, List[str]]]:
     """
-    Generates a problem instance based on the specified config.
+    Generates the component network of a problem instance based on the specified config.
 
     :param args: arguments of the instance generation, i.e., parameters
-    :param idx: instance index
+    :param rng: random number generator (stream) to be used
+    :return: suspect components with affected-by relations and anomalies
     """
-    sus_comp = randomly_gen_suspect_components_with_affected_by_relations_and_anomalies(
-        args.components, args.anomaly_percentage, args.affected_by_ub_percentage
+    if args.vectorized_network:
+        return randomly_gen_suspect_components_with_affected_by_relations_and_anomalies_vectorized(
+            args.components, args.anomaly_percentage, args.affected_by_ub_percentage, rng
+        )
+    return randomly_gen_suspect_components_with_affected_by_relations_and_anomalies(
+        args.components, args.anomaly_percentage, args.affected_by_ub_percentage, rng
     )
-    ground_truth_fault_paths = generate_ground_truth_fault_paths(sus_comp)
+
+
+def generate_instance(args: argparse.Namespace, idx: int, rng: random.Random) -> str:
+    """
+    Generates a problem instance based on the specified config.
+
+    With `max_fault_paths`, the fault paths of each generated component network are counted first (without
+    enumerating them, aborted as soon as the max is exceeded): depending on `fault_path_guard`, networks with too
+    many fault paths are either resampled ("resample") or kept and flagged in the fault path stats of the instance
+    ("flag"). The fault paths of flagged networks are not generated, i.e., flagged instances have neither ground truth
+    fault paths nor error codes and are skipped by the evaluation.
+
+    :param args: arguments of the instance generation, i.e., parameters
+    :param idx: instance index
+    :param rng: random number generator (stream) to be used
+    :return: instance name
+    """
+    sus_comp = generate_component_network(args, rng)
+    fault_path_len_dist = None
+    if args.max_fault_paths is not None:
+        attempts = 1
+        fault_path_len_dist = count_ground_truth_fault_paths(sus_comp, args.max_fault_paths)
+        while fault_path_len_dist is None and args.fault_path_guard == "resample":
+            if attempts == MAX_RESAMPLING_ATTEMPTS:
+                raise ValueError(
+                    "no component network with at most " + str(args.max_fault_paths) + " fault paths after "
+                    + str(attempts) + " attempts -- increase max_fault_paths or use fault_path_guard 'flag'"
+                )
+            sus_comp = generate_component_network(args, rng)
+            fault_path_len_dist = count_ground_truth_fault_paths(sus_comp, args.max_fault_paths)
+            attempts += 1
+    if args.max_fault_paths is not None and fault_path_len_dist is None:
+        print("instance", idx, "exceeds max fault paths (" + str(args.max_fault_paths) + ") -- not generated")
+        ground_truth_fault_paths = []
+    else:
+        ground_truth_fault_paths = generate_ground_truth_fault_paths(sus_comp)
+        if fault_path_len_dist is None:  # not counted beforehand
+            fault_path_len_dist = Counter(len(fault_path) for fault_path in ground_truth_fault_paths)
     errors = randomly_gen_error_codes_with_fault_cond_and_suspect_components(
         ground_truth_fault_paths, list(sus_comp.keys()), args.fault_path_comp_ub_percentage,
-        args.distractor_ub_percentage
+        args.distractor_ub_percentage, rng
     )
     sim_accuracies = []
     if args.sim_classification_models:
         # we need a model, i.e., an acc, for each component
         sim_accuracies = {comp: (
-            str(random.uniform(args.model_acc_lb, args.model_acc_ub)), str(sus_comp[comp][0])
+            str(rng.uniform(args.model_acc_lb, args.model_acc_ub)), str(sus_comp[comp][0])
         ) for comp in sus_comp.keys()}
 
     filename = write_instance_to_file(
         sus_comp, ground_truth_fault_paths, errors, args.seed, args.anomaly_percentage, args.affected_by_ub_percentage,
         args.fault_path_comp_ub_percentage, args.distractor_ub_percentage, idx, sim_accuracies, args.model_acc_lb,
-        args.model_acc_ub
+        args.model_acc_ub, args.instance_format, get_fault_path_stats(fault_path_len_dist)
     )
     if args.extend_kg:
-        assert clear_hosted_kg()
-        add_generated_instance_to_kg(sus_comp, errors)
-        create_kg_file_for_generated_instance(filename)
+        kg_extension = COMPRESSED_KG_EXTENSION if args.compress_kg else KG_EXTENSION
+        if args.offline_kg:
+            write_instance_kg_to_file(sus_comp, errors, "instances/" + filename + kg_extension)
+        else:
+            assert clear_hosted_kg()
+            add_generated_instance_to_kg(sus_comp, errors, args.batched_kg)
+            create_kg_file_for_generated_instance(filename, kg_extension)
+    return filename
 
 
-if __name__ == '__main__':
+def generate_instance_with_own_rng(args: argparse.Namespace, idx: int) -> str:
+    """
+    Generates a problem instance using an independent random number stream derived from `(seed, idx)`, i.e., the
+    instance does not depend on any other instance of the set and can be generated in any process / order.
+
+    :param args: arguments of the instance generation, i.e., parameters
+    :param idx: instance index
+    :return: instance name
+    """
+    print("gen instance", idx)
+    # str seeds are hashed (SHA-512), i.e., the stream is independent of PYTHONHASHSEED and the process
+    return generate_instance(args, idx, random.Random(str(args.seed) + "_" + str(idx)))
+
+
+def get_instance_set_name_for_config(config: argparse.Namespace) -> str:
+    """
+    Creates the name of the instance set generated for the specified config.
+
+    :param config: config of the instance generation, i.e., parameters
+    :return: instance set name
+    """
+    return get_instance_set_name(
+        config.components, config.anomaly_percentage, config.affected_by_ub_percentage,
+        config.fault_path_comp_ub_percentage, config.distractor_ub_percentage, config.model_acc_lb,
+        config.model_acc_ub, config.seed
+    )
+
+
+def generate_instances_sequentially(args: argparse.Namespace) -> Iterator[str]:
+    """
+    Generates the instances of the set one after another from a single random number stream seeded with `seed`.
+
+    :param args: arguments of the instance generation, i.e., parameters
+    :return: generator of instance names
+    """
+    rng = random.Random(args.seed)
+    for i in range(args.instances_per_conf):
+        print("gen instance", i)
+        yield generate_instance(args, i, rng)
+
+
+def generate_instance_set(args: argparse.Namespace) -> None:
+    """
+    Generates the instance set based on the specified config.
+
+    Without `workers`, all instances are generated sequentially from one random number stream seeded with `seed`.
+    With `workers`, each instance gets its own stream (cf.
+    `generate_instance_with_own_rng()`) and the instances are generated by a process pool -- the resulting set is
+    identical for any number of workers.
+
+    With `archive`, the files of each generated instance are moved into one archive per instance set
+    (`instances/<instance_set>.zip`) in the order of the instance indices.
+
+    :param args: arguments of the instance generation, i.e., parameters
+    """
+    with ExitStack() as stack:
+        archive = None
+        if args.archive:
+            os.makedirs("instances", exist_ok=True)
+            archive = stack.enter_context(
+                zipfile.ZipFile("instances/" + get_instance_set_name_for_config(args) + ARCHIVE_EXTENSION, mode="w")
+            )
+        if args.workers is None:
+            filenames = generate_instances_sequentially(args)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=args.workers))
+            # consume the results to propagate exceptions of the workers
+            filenames = executor.map(generate_instance_with_own_rng, repeat(args), range(args.instances_per_conf))
+        for filename in filenames:
+            if archive is not None:
+                move_instance_to_archive(archive, "instances", filename)
+
+
+def positive_int(value: str) -> int:
+    """
+    Parses a positive integer argument, e.g., the number of workers.
+
+    :param value: argument value
+    :return: positive integer
+    """
+    num = int(value)
+    if num < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return num
+
+
+def create_arg_parser() -> argparse.ArgumentParser:
+    """
+    Creates the argument parser for the instance generation, i.e., the parameters and their defaults.
+
+    :return: argument parser
+    """
     parser = argparse.ArgumentParser(description='Randomly generate parametrized NeSy diag problem instances.')
     # cf. paper for reasoning about default parameter settings
     parser.add_argument('--seed', type=int, default=42)
@@ -516,11 +997,25 @@ if __name__ == '__main__':
     parser.add_argument('--sim-classification-models', action='store_true', default=False)
     parser.add_argument('--model-acc-lb', type=float, default=0.6)
     parser.add_argument('--model-acc-ub', type=float, default=0.95)
+    parser.add_argument('--workers', type=positive_int, default=None)
+    parser.add_argument('--offline-kg', action='store_true', default=False)
+    parser.add_argument('--batched-kg', action='store_true', default=False)
+    parser.add_argument('--vectorized-network', action='store_true', default=False)
+    parser.add_argument('--instance-format', type=str, choices=['json', 'npz'], default='json')
+    parser.add_argument('--archive', action='store_true', default=False)
+    parser.add_argument('--compress-kg', action='store_true', default=False)
+    parser.add_argument('--max-fault-paths', type=int, default=None)
+    parser.add_argument('--fault-path-guard', type=str, choices=['resample', 'flag'], default='resample')
+    return parser
+
+
+if __name__ == '__main__':
+    parser = create_arg_parser()
     args = parser.parse_args()
 
-    random.seed(args.seed)
-    test_basic_functionality()
+    if args.workers is not None and args.workers > 1 and args.extend_kg and not args.offline_kg:
+        # all instances would share the single hosted KG
+        parser.error("--extend-kg requires a single worker (or --offline-kg)")
 
-    for i in range(args.instances_per_conf):
-        print("gen instance", i)
-        generate_instance(args, i)
+    test_basic_functionality()
+    generate_instance_set(args)
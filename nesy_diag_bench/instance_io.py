@@ -0,0 +1,423 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import functools
+import glob
+import gzip
+import io
+import json
+import os
+import zipfile
+from types import MappingProxyType
+from typing import Dict, Tuple, List, Union, Optional, BinaryIO, Mapping
+
+import numpy as np
+
+INSTANCE_EXTENSIONS = [".npz", ".json"]  # in order of preference
+NPZ_FORMAT_VERSION = 2
+KG_EXTENSION = ".nt"
+COMPRESSED_KG_EXTENSION = ".nt.gz"
+ARCHIVE_EXTENSION = ".zip"
+FIXED_ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)  # reproducible archives
+
+
+def get_instance_name(instance: str) -> str:
+    """
+    Extracts the name of the problem instance from its path, e.g., "129_20_10_50_10_95_99_42_0".
+
+    :param instance: problem instance file
+    :return: instance name
+    """
+    return os.path.splitext(os.path.basename(instance))[0]
+
+
+def get_kg_file(instance: str) -> str:
+    """
+    Determines the KG file (.nt or compressed .nt.gz) belonging to the problem instance.
+
+    :param instance: problem instance file
+    :return: KG file
+    """
+    kg_file = os.path.splitext(instance)[0] + KG_EXTENSION
+    compressed_kg_file = os.path.splitext(instance)[0] + COMPRESSED_KG_EXTENSION
+    return compressed_kg_file if instance_file_exists(compressed_kg_file) else kg_file
+
+
+def split_archive_path(instance: str) -> Tuple[Optional[str], str]:
+    """
+    Splits the path of a problem instance stored in an instance set archive, e.g.,
+    "instances/129_20_10_50_10_95_99_42.zip/129_20_10_50_10_95_99_42_0.json", into archive and member.
+
+    :param instance: problem instance file
+    :return: (archive, member) or (None, instance) for instances not stored in an archive
+    """
+    idx = instance.find(ARCHIVE_EXTENSION + "/")
+    if idx == -1:
+        return None, instance
+    return instance[:idx + len(ARCHIVE_EXTENSION)], instance[idx + len(ARCHIVE_EXTENSION) + 1:]
+
+
+def instance_file_exists(path: str) -> bool:
+    """
+    Checks whether the file belonging to a problem instance exists, either directly or in an archive.
+
+    :param path: file path
+    :return: whether the file exists
+    """
+    archive, member = split_archive_path(path)
+    if archive is None:
+        return os.path.isfile(path)
+    return member in open_archive(archive).NameToInfo
+
+
+@functools.lru_cache(maxsize=8)
+def open_archive(archive: str) -> zipfile.ZipFile:
+    """
+    Opens an instance set archive for random access (the central directory is only parsed once per archive).
+
+    :param archive: instance set archive
+    :return: opened archive
+    """
+    return zipfile.ZipFile(archive, mode="r")
+
+
+def open_instance_file(path: str) -> BinaryIO:
+    """
+    Opens a file belonging to a problem instance (instance or KG file), either stored directly or in an archive.
+
+    :param path: file path
+    :return: binary file object
+    """
+    archive, member = split_archive_path(path)
+    if archive is None:
+        return open(path, "rb")
+    return open_archive(archive).open(member, "r")
+
+
+def open_kg_file(instance: str) -> BinaryIO:
+    """
+    Opens the KG file (.nt) belonging to the problem instance, compressed KG files (.nt.gz) are decompressed.
+
+    :param instance: problem instance file
+    :return: binary file object (N-Triples)
+    """
+    kg_file = get_kg_file(instance)
+    if not kg_file.endswith(COMPRESSED_KG_EXTENSION):
+        return open_instance_file(kg_file)
+    archive, _ = split_archive_path(kg_file)
+    if archive is None:
+        return gzip.open(kg_file, "rb")
+    with open_instance_file(kg_file) as f:  # small archive members -> decompressed in memory
+        return io.BytesIO(gzip.decompress(f.read()))
+
+
+def create_kg_file(kg_file: str) -> BinaryIO:
+    """
+    Creates a KG file, compressed (gzip) in case of the `.nt.gz` extension.
+
+    :param kg_file: path of the KG file
+    :return: binary file object (N-Triples) for writing
+    """
+    if kg_file.endswith(COMPRESSED_KG_EXTENSION):
+        return gzip.GzipFile(kg_file, mode="wb", mtime=0)  # reproducible files
+    return open(kg_file, "wb")
+
+
+def list_archived_instances(archive: str) -> List[str]:
+    """
+    Lists all problem instances stored in the specified instance set archive.
+
+    :param archive: instance set archive
+    :return: problem instance files (archive paths)
+    """
+    return [
+        archive + "/" + member for member in open_archive(archive).namelist()
+        if os.path.splitext(member)[1] in INSTANCE_EXTENSIONS
+    ]
+
+
+def list_instances(instance_location: str) -> List[str]:
+    """
+    Lists all problem instances (any supported format) in the specified directory or instance set archive.
+    Directories may contain instance files as well as instance set archives. If an instance is available in several
+    formats (e.g., exported to JSON), only the preferred one is listed.
+
+    :param instance_location: directory or instance set archive containing problem instances
+    :return: problem instance files
+    """
+    if instance_location.endswith(ARCHIVE_EXTENSION):
+        return list_archived_instances(instance_location)
+    instances = {}
+    for ext in INSTANCE_EXTENSIONS:
+        for instance in glob.glob(instance_location + "/*" + ext):
+            instances.setdefault(get_instance_name(instance), instance)
+    for archive in sorted(glob.glob(instance_location + "/*" + ARCHIVE_EXTENSION)):
+        for instance in list_archived_instances(archive):
+            instances.setdefault(get_instance_name(instance), instance)
+    return list(instances.values())
+
+
+def move_instance_to_archive(archive: zipfile.ZipFile, instance_dir: str, filename: str) -> None:
+    """
+    Moves all files of the problem instance (instance and KG file) into the instance set archive.
+
+    :param archive: instance set archive (opened for writing)
+    :param instance_dir: directory containing the instance files
+    :param filename: instance name
+    """
+    for ext in INSTANCE_EXTENSIONS + [KG_EXTENSION, COMPRESSED_KG_EXTENSION]:
+        path = os.path.join(instance_dir, filename + ext)
+        if not os.path.isfile(path):
+            continue
+        info = zipfile.ZipInfo(filename + ext, date_time=FIXED_ZIP_DATE_TIME)
+        # .npz and .nt.gz files are already compressed
+        info.compress_type = zipfile.ZIP_STORED if ext in [".npz", COMPRESSED_KG_EXTENSION] else zipfile.ZIP_DEFLATED
+        with open(path, "rb") as f:
+            archive.writestr(info, f.read())
+        os.remove(path)
+
+
+def to_csr(lists: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts lists of integer ids to compressed sparse row (CSR) representation.
+
+    :param lists: lists of integer ids
+    :return: (indptr, indices)
+    """
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(lst) for lst in lists])
+    indices = np.fromiter((i for lst in lists for i in lst), dtype=np.int32, count=int(indptr[-1]))
+    return indptr, indices
+
+
+def from_csr(indptr: np.ndarray, indices: np.ndarray, names: List[str]) -> List[List[str]]:
+    """
+    Converts the CSR representation back to lists of names.
+
+    :param indptr: CSR row pointers
+    :param indices: CSR integer ids
+    :param names: names of the integer ids
+    :return: lists of names
+    """
+    ids = indices.tolist()
+    bounds = indptr.tolist()
+    return [[names[i] for i in ids[bounds[r]:bounds[r + 1]]] for r in range(len(bounds) - 1)]
+
+
+def write_npz(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Writes the arrays to a compressed `.npz` file.
+
+    In contrast to `np.savez_compressed()`, the zip entries get a fixed timestamp, i.e., the file content only
+    depends on the arrays (reproducible instance files).
+
+    :param path: path of the `.npz` file
+    :param arrays: arrays to be stored (by name)
+    """
+    with zipfile.ZipFile(path, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, arr in arrays.items():
+            info = zipfile.ZipInfo(name + ".npy", date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(info, "w", force_zip64=True) as f:
+                np.lib.format.write_array(f, np.asanyarray(arr), allow_pickle=False)
+
+
+def write_instance_npz(
+        path: str, suspect_components: Dict[str, Tuple[bool, List[str]]], ground_truth_fault_paths: List[List[str]],
+        error_codes: Dict[str, Tuple[str, List[str]]], sim_accuracies: Union[Dict[str, Tuple[str, str]], List],
+        fault_path_stats: Optional[Dict] = None
+) -> None:
+    """
+    Writes the problem instance in the compact binary format, i.e., integer component ids, CSR adjacency for the
+    affected-by relations, fault paths and error code associations, and float arrays for the simulated accuracies.
+
+    :param path: path of the `.npz` file
+    :param suspect_components: suspect components
+    :param ground_truth_fault_paths: ground truth fault paths
+    :param error_codes: error codes
+    :param sim_accuracies: simulated accuracies for components (empty if not simulated)
+    :param fault_path_stats: number and length distribution of the ground truth fault paths
+    """
+    comp_names = list(suspect_components.keys())
+    comp_ids = {comp: i for i, comp in enumerate(comp_names)}
+    aff_by_indptr, aff_by_indices = to_csr([[comp_ids[c] for c in suspect_components[k][1]] for k in comp_names])
+    fp_indptr, fp_indices = to_csr([[comp_ids[c] for c in fp] for fp in ground_truth_fault_paths])
+    ec_indptr, ec_indices = to_csr([[comp_ids[c] for c in error_codes[ec][1]] for ec in error_codes])
+    sim_acc = [float(sim_accuracies[comp][0]) for comp in comp_names] if len(sim_accuracies) > 0 else []
+    arrays = {
+        "format_version": np.array(NPZ_FORMAT_VERSION),
+        "component_names": np.array(comp_names, dtype=str),
+        "anomalies": np.array([suspect_components[k][0] for k in comp_names], dtype=bool),
+        "aff_by_indptr": aff_by_indptr,
+        "aff_by_indices": aff_by_indices,
+        "fault_path_indptr": fp_indptr,
+        "fault_path_indices": fp_indices,
+        "error_codes": np.array(list(error_codes.keys()), dtype=str),
+        "fault_conditions": np.array([error_codes[ec][0] for ec in error_codes], dtype=str),
+        "error_code_indptr": ec_indptr,
+        "error_code_indices": ec_indices,
+        "sim_accuracies": np.array(sim_acc, dtype=np.float64)
+    }
+    if fault_path_stats is not None:
+        len_dist = fault_path_stats["fault_path_len_distribution"]
+        arrays["fault_path_lengths"] = np.array([int(k) for k in len_dist], dtype=np.int64)
+        arrays["fault_path_length_counts"] = np.array(list(len_dist.values()), dtype=np.int64)
+        arrays["exceeds_max_fault_paths"] = np.array(fault_path_stats["exceeds_max_fault_paths"])
+    write_npz(path, arrays)
+
+
+def load_instance_npz(path: str) -> Dict:
+    """
+    Loads a problem instance stored in the compact binary format.
+
+    The result has exactly the structure (and value representation) of the parsed JSON instance file.
+
+    :param path: path of the `.npz` file (directly or in an instance set archive)
+    :return: problem instance
+    """
+    with open_instance_file(path) as f:
+        content = io.BytesIO(f.read())
+    with np.load(content, allow_pickle=False) as data:
+        comp_names = data["component_names"].tolist()
+        anomalies = data["anomalies"].tolist()
+        aff_by = from_csr(data["aff_by_indptr"], data["aff_by_indices"], comp_names)
+        fault_paths = from_csr(data["fault_path_indptr"], data["fault_path_indices"], comp_names)
+        error_codes = data["error_codes"].tolist()
+        fault_conditions = data["fault_conditions"].tolist()
+        associations = from_csr(data["error_code_indptr"], data["error_code_indices"], comp_names)
+        sim_acc = data["sim_accuracies"].tolist()
+        fault_path_stats = None
+        if "fault_path_lengths" in data.files:  # not available in format version 1
+            len_dist = dict(zip(data["fault_path_lengths"].tolist(), data["fault_path_length_counts"].tolist()))
+            exceeds_max_fault_paths = bool(data["exceeds_max_fault_paths"])
+            fault_path_stats = {
+                # not counted completely if exceeding the max number of fault paths
+                "num_of_fault_paths": None if exceeds_max_fault_paths else sum(len_dist.values()),
+                "fault_path_len_distribution": {str(k): v for k, v in len_dist.items()},
+                "exceeds_max_fault_paths": exceeds_max_fault_paths
+            }
+    instance = {
+        "suspect_components": {comp: [anomalies[i], aff_by[i]] for i, comp in enumerate(comp_names)},
+        "ground_truth_fault_paths": fault_paths,
+        "error_codes": {ec: [fault_conditions[i], associations[i]] for i, ec in enumerate(error_codes)},
+        # same representation as in the JSON files: (str(acc), str(ground truth anomaly))
+        "sim_accuracies": {
+            comp: [str(sim_acc[i]), str(anomalies[i])] for i, comp in enumerate(comp_names)
+        } if len(sim_acc) > 0 else []
+    }
+    if fault_path_stats is not None:
+        instance["fault_path_stats"] = fault_path_stats
+    return instance
+
+
+def load_problem_instance(instance: str) -> Dict:
+    """
+    Loads the problem instance from file (JSON or compact binary format), stored directly or in an instance set
+    archive.
+
+    :param instance: problem instance file
+    :return: problem instance
+    """
+    if instance.endswith(".npz"):
+        return load_instance_npz(instance)
+    with open_instance_file(instance) as f:
+        return json.load(f)
+
+
+class ProblemInstance:
+    """
+    Parsed, immutable problem instance with indexed lookups by component, i.e., the instance file is parsed once per
+    diagnosis run and shared by the accessors and the evaluation.
+    """
+
+    def __init__(self, instance: str, data: Dict) -> None:
+        """
+        Initializes the problem instance.
+
+        :param instance: problem instance file
+        :param data: parsed problem instance (cf. `load_problem_instance()`)
+        """
+        self.path = instance
+        self.name = get_instance_name(instance)
+        self.suspect_components: Mapping[str, Tuple[bool, Tuple[str, ...]]] = MappingProxyType({
+            comp: (bool(anomaly), tuple(aff_by)) for comp, (anomaly, aff_by) in data["suspect_components"].items()
+        })
+        self.ground_truth_fault_paths = tuple(tuple(fp) for fp in data["ground_truth_fault_paths"])
+        # fault paths of such instances are not generated (cf. `instance_gen.generate_instance()`)
+        self.exceeds_max_fault_paths = bool(data.get("fault_path_stats", {}).get("exceeds_max_fault_paths", False))
+        self.error_codes: Mapping[str, Tuple[str, Tuple[str, ...]]] = MappingProxyType({
+            code: (fault_cond, tuple(comps)) for code, (fault_cond, comps) in data["error_codes"].items()
+        })
+        # empty list in the instance file if not simulated
+        self.sim_accuracies: Mapping[str, Tuple[str, str]] = MappingProxyType({
+            comp: tuple(sim_acc) for comp, sim_acc in dict(data["sim_accuracies"]).items()
+        })
+        self.frozen = True
+
+    def __setattr__(self, name: str, value) -> None:
+        if getattr(self, "frozen", False):
+            raise AttributeError("problem instances are immutable")
+        super().__setattr__(name, value)
+
+    @staticmethod
+    def load(instance: str) -> "ProblemInstance":
+        """
+        Loads the problem instance from file (any supported format, stored directly or in an instance set archive).
+
+        :param instance: problem instance file
+        :return: problem instance
+        """
+        return ProblemInstance(instance, load_problem_instance(instance))
+
+    def is_anomaly(self, component: str) -> bool:
+        """
+        Checks whether the specified component is a ground truth anomaly.
+
+        :param component: component to be checked
+        :return: whether the component is anomalous
+        """
+        return self.suspect_components[component][0]
+
+    def get_affected_by(self, component: str) -> Tuple[str, ...]:
+        """
+        Retrieves the affected-by relations of the specified component.
+
+        :param component: component to retrieve affected-by relations for
+        :return: affecting components
+        """
+        return self.suspect_components[component][1]
+
+
+def export_instance_to_json(instance: str) -> str:
+    """
+    Exports the problem instance to the JSON format (next to the original file). Instances stored in an instance set
+    archive are exported to a directory named after the archive, e.g., "instances/X.zip/X_0.npz" to
+    "instances/X/X_0.json", so that the export does not shadow the archived instances in list_instances().
+
+    :param instance: problem instance file
+    :return: exported JSON file
+    """
+    archive, member = split_archive_path(instance)
+    if archive is None:
+        json_file = os.path.splitext(instance)[0] + ".json"
+    else:
+        export_dir = os.path.splitext(archive)[0]
+        os.makedirs(export_dir, exist_ok=True)
+        json_file = os.path.join(export_dir, os.path.splitext(os.path.basename(member))[0] + ".json")
+    with open(json_file, "w") as f:
+        json.dump(load_problem_instance(instance), f, indent=4, default=str)
+    return json_file
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export problem instances in compact binary format to JSON.')
+    parser.add_argument('--instances', type=str, required=True)
+    args = parser.parse_args()
+
+    npz_instances = glob.glob(args.instances + "/*.npz")
+    for instance_archive in sorted(glob.glob(args.instances + "/*" + ARCHIVE_EXTENSION)):
+        npz_instances += [i for i in list_archived_instances(instance_archive) if i.endswith(".npz")]
+    for npz_instance in npz_instances:
+        print("exported:", export_instance_to_json(npz_instance))
@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import gzip
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Tuple, Type, Optional
+from urllib.parse import urlsplit, parse_qs
+
+from config import FUSEKI_URL, DATASET_NAME
+from kg_transport import N_TRIPLES, N_QUADS
+
+SPARQL_RESULTS_JSON = "application/sparql-results+json"
+FORM_URLENCODED = "application/x-www-form-urlencoded"
+
+
+class InProcessKG:
+    """
+    In-process triple store (rdflib) that replaces the hosted (Fuseki) dataset during the evaluation.
+
+    The KG of each instance is loaded directly into memory (no clear / upload requests). Since the diagnosis state
+    machine queries the KG via the SPARQL protocol, the store additionally serves the endpoints of the hosted dataset
+    (`/<dataset>/query`, `/<dataset>/update`, `/<dataset>/data`) on the address of the Fuseki server, i.e., neither
+    Fuseki nor a JVM is required.
+
+    Alternatively, the KGs of an entire instance set can be loaded at once into named graphs (N-Quads), and the
+    served graph is then switched per instance without copying any triples.
+    """
+
+    def __init__(self, dataset_name: str = DATASET_NAME) -> None:
+        """
+        Initializes the in-process KG.
+
+        :param dataset_name: name of the served dataset
+        """
+        try:  # optional dependency, only imported for the in-process KG backend
+            import rdflib
+        except ImportError:
+            raise ImportError("the in-process KG backend requires rdflib (pip install rdflib)")
+        self.rdflib = rdflib
+        self.dataset_name = dataset_name
+        self.dataset = self.rdflib.Dataset()  # named graphs
+        self.graph = self.rdflib.Graph()  # served graph
+        self.lock = threading.Lock()
+        self.server = None
+
+    def clear(self) -> None:
+        """
+        Removes all triples from the KG.
+        """
+        with self.lock:
+            self.graph = self.rdflib.Graph()
+
+    def load_ntriples(self, data: bytes) -> None:
+        """
+        Adds the specified triples to the KG.
+
+        :param data: triples (N-Triples)
+        """
+        with self.lock:
+            self.graph.parse(data=data, format="nt")
+
+    def load_nquads(self, data: bytes) -> None:
+        """
+        Adds the specified quads to the named graphs.
+
+        :param data: quads (N-Quads)
+        """
+        with self.lock:
+            self.dataset.parse(data=data, format="nquads")
+
+    def use_graph(self, graph: str) -> None:
+        """
+        Serves the specified named graph (instead of the current graph).
+
+        :param graph: IRI of the named graph
+        """
+        with self.lock:
+            self.graph = self.dataset.graph(self.rdflib.URIRef(graph))
+
+    def serialize(self) -> bytes:
+        """
+        Serializes the KG.
+
+        :return: triples (N-Triples)
+        """
+        with self.lock:
+            return self.graph.serialize(format="nt", encoding="utf-8")
+
+    def query(self, query: str) -> Tuple[bytes, str]:
+        """
+        Answers the specified SPARQL query.
+
+        :param query: SPARQL query
+        :return: (serialized result, content type)
+        """
+        with self.lock:
+            result = self.graph.query(query)
+            if result.type in ["SELECT", "ASK"]:
+                return result.serialize(format="json"), SPARQL_RESULTS_JSON
+            return result.serialize(format="nt", encoding="utf-8"), N_TRIPLES
+
+    def update(self, update: str) -> None:
+        """
+        Performs the specified SPARQL update.
+
+        :param update: SPARQL update
+        """
+        with self.lock:
+            self.graph.update(update)
+
+    def start(self, url: str = FUSEKI_URL) -> None:
+        """
+        Starts serving the SPARQL endpoints of the dataset (background thread).
+
+        :param url: URL of the server (the one otherwise hosting the Fuseki server)
+        """
+        address = urlsplit(url)
+        self.server = ThreadingHTTPServer((address.hostname, address.port), create_request_handler(self))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        Stops serving the SPARQL endpoints.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def create_request_handler(kg: InProcessKG) -> Type[BaseHTTPRequestHandler]:
+    """
+    Creates the request handler serving the SPARQL endpoints (Fuseki-compatible) of the in-process KG.
+
+    :param kg: in-process KG
+    :return: request handler class
+    """
+
+    class SPARQLRequestHandler(BaseHTTPRequestHandler):
+
+        def get_operation(self) -> Optional[str]:
+            parts = urlsplit(self.path).path.strip("/").split("/")
+            if parts[0] != kg.dataset_name:
+                return None
+            return parts[1] if len(parts) > 1 else "query"
+
+        def read_body(self) -> bytes:
+            if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            else:  # streamed request
+                body = bytearray()
+                while True:
+                    chunk_size = int(self.rfile.readline().split(b";")[0], 16)
+                    if chunk_size == 0:
+                        self.rfile.readline()
+                        break
+                    body += self.rfile.read(chunk_size)
+                    self.rfile.readline()
+            if self.headers.get("Content-Encoding", "") == "gzip":
+                return gzip.decompress(body)
+            return bytes(body)
+
+        def get_param(self, name: str) -> Optional[str]:
+            params = parse_qs(urlsplit(self.path).query)
+            if self.command == "POST":
+                body = self.read_body().decode("utf-8")
+                if self.headers.get("Content-Type", "").startswith(FORM_URLENCODED):
+                    params.update(parse_qs(body))
+                else:  # direct POST, e.g., "application/sparql-query"
+                    return body
+            return params[name][0] if name in params else None
+
+        def respond(self, status: int, content: bytes = b"", content_type: str = "text/plain") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def handle_request(self) -> None:
+            operation = self.get_operation()
+            try:
+                if operation in ["query", "sparql"]:
+                    query = self.get_param("query")
+                    if query is None:
+                        self.respond(400, b"missing query")
+                        return
+                    self.respond(200, *kg.query(query))
+                elif operation == "update" and self.command == "POST":
+                    update = self.get_param("update")
+                    if update is None:
+                        self.respond(400, b"missing update")
+                        return
+                    kg.update(update)
+                    self.respond(200)
+                elif operation == "data" and self.command == "GET":
+                    self.respond(200, kg.serialize(), N_TRIPLES)
+                elif operation == "data" and self.headers.get("Content-Type", "").startswith(N_QUADS):
+                    kg.load_nquads(self.read_body())
+                    self.respond(200)
+                elif operation == "data" and self.command in ["POST", "PUT"]:
+                    if self.command == "PUT":
+                        kg.clear()
+                    kg.load_ntriples(self.read_body())
+                    self.respond(200)
+                else:
+                    self.respond(404, b"unknown endpoint")
+            except Exception as e:  # invalid SPARQL / triples
+                self.respond(400, str(e).encode("utf-8"))
+
+        def do_GET(self) -> None:
+            self.handle_request()
+
+        def do_POST(self) -> None:
+            self.handle_request()
+
+        def do_PUT(self) -> None:
+            self.handle_request()
+
+        def log_message(self, format: str, *args) -> None:
+            pass  # no access log for each query of the state machine
+
+    return SPARQLRequestHandler
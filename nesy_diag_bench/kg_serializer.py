@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+from typing import Dict, Tuple, List, Iterator
+
+from config import ONTOLOGY_PREFIX, RDF_TYPE, XSD_INTEGER
+from instance_io import create_kg_file
+
+
+def iri(name: str) -> str:
+    """
+    Creates the N-Triples representation of an IRI in the ontology namespace.
+
+    :param name: local name of the IRI
+    :return: N-Triples IRI
+    """
+    return "<" + ONTOLOGY_PREFIX + name + ">"
+
+
+def literal(value: str) -> str:
+    """
+    Creates the N-Triples representation of a (plain) string literal.
+
+    :param value: value of the literal
+    :return: N-Triples literal
+    """
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return '"' + escaped + '"'
+
+
+def integer_literal(value: int) -> str:
+    """
+    Creates the N-Triples representation of an integer literal.
+
+    :param value: value of the literal
+    :return: N-Triples literal
+    """
+    return '"' + str(value) + '"^^<' + XSD_INTEGER + ">"
+
+
+def triple(subj: str, pred: str, obj: str) -> str:
+    """
+    Creates an N-Triples statement.
+
+    :param subj: subject (N-Triples term)
+    :param pred: predicate (N-Triples term)
+    :param obj: object (N-Triples term)
+    :return: N-Triples statement (line)
+    """
+    return subj + " " + pred + " " + obj + " .\n"
+
+
+def gen_instance_triples(
+        suspect_components: Dict[str, Tuple[bool, List[str]]], error_codes: Dict[str, Tuple[str, List[str]]]
+) -> Iterator[str]:
+    """
+    Generates the triples the `ExpertKnowledgeEnhancer` creates for the problem instance, i.e., the instance KG,
+    without any KG server.
+
+    In contrast to the enhancer, the entity IRIs are derived from the names instead of random UUIDs, i.e., the
+    serialization is reproducible. Only names and relations are queried in the diagnostic process.
+
+    :param suspect_components: suspect components
+    :param error_codes: error codes
+    :return: generator of N-Triples statements
+    """
+    rdf_type = "<" + RDF_TYPE + ">"
+    for comp in suspect_components.keys():
+        yield triple(iri("component_" + comp), rdf_type, iri("SuspectComponent"))
+        yield triple(iri("component_" + comp), iri("component_name"), literal(comp))
+    for comp in suspect_components.keys():
+        for aff_by in suspect_components[comp][1]:
+            yield triple(iri("component_" + comp), iri("affected_by"), iri("component_" + aff_by))
+    for code in error_codes.keys():
+        fault_cond, associated_comps = error_codes[code]
+        code_iri = iri("error_code_" + code)
+        fault_cond_iri = iri("fault_condition_" + code)
+        yield triple(code_iri, rdf_type, iri("ErrorCode"))
+        yield triple(code_iri, iri("code"), literal(code))
+        yield triple(fault_cond_iri, rdf_type, iri("FaultCondition"))
+        yield triple(fault_cond_iri, iri("condition_desc"), literal(fault_cond))
+        yield triple(code_iri, iri("represents"), fault_cond_iri)
+        # the order of the associated components is their priority
+        for idx, comp in enumerate(associated_comps):
+            da_iri = iri("diag_association_" + code + "_" + str(idx))
+            yield triple(da_iri, rdf_type, iri("DiagnosticAssociation"))
+            yield triple(code_iri, iri("hasAssociation"), da_iri)
+            yield triple(da_iri, iri("priority_id"), integer_literal(idx))
+            yield triple(da_iri, iri("pointsTo"), iri("component_" + comp))
+
+
+def write_instance_kg_to_file(
+        suspect_components: Dict[str, Tuple[bool, List[str]]], error_codes: Dict[str, Tuple[str, List[str]]],
+        kg_file: str
+) -> None:
+    """
+    Writes the KG of the problem instance to an N-Triples file (.nt, or compressed .nt.gz) -- offline counterpart of
+    extending the hosted KG and exporting it afterwards.
+
+    :param suspect_components: suspect components
+    :param error_codes: error codes
+    :param kg_file: path of the KG file to be written
+    """
+    with create_kg_file(kg_file) as f:
+        f.writelines(t.encode("utf-8") for t in gen_instance_triples(suspect_components, error_codes))
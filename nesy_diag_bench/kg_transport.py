@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import os
+import time
+import zlib
+from typing import Callable, Iterable, Iterator, BinaryIO, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+from config import KG_TRANSFER_COMPRESSION
+from instance_io import create_kg_file
+
+N_TRIPLES = "application/n-triples"
+N_QUADS = "application/n-quads"
+CHUNK_SIZE = 1 << 16
+POOL_SIZE = 4
+MAX_RETRIES = 4
+RETRY_BACKOFF = 0.5  # seconds, doubled with each retry
+RETRY_STATUS_CODES = [502, 503, 504]
+
+sessions = {}  # per process -- pooled connections must not be shared with forked processes
+
+
+def get_session() -> requests.Session:
+    """
+    Provides the HTTP session of the current process, i.e., pooled keep-alive connections to the KG server.
+
+    :return: HTTP session
+    """
+    pid = os.getpid()
+    if pid not in sessions:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        sessions[pid] = session
+    return sessions[pid]
+
+
+def get_endpoint(operation: str) -> str:
+    """
+    Determines the endpoint of the hosted dataset for the specified operation.
+
+    The endpoint is determined per request, since parallel evaluation workers use their own datasets
+    (cf. `eval.configure_kg_endpoint()`).
+
+    :param operation: operation, e.g., "update" or "data"
+    :return: endpoint URL
+    """
+    return config.FUSEKI_URL + "/" + config.DATASET_NAME + "/" + operation
+
+
+def request_with_retries(
+        method: str, url: str, body: Optional[Callable[[], Union[bytes, Iterable[bytes], dict]]] = None, **kwargs
+) -> requests.Response:
+    """
+    Sends the request, retrying with exponential backoff on connection errors and temporary server errors.
+
+    The body is specified as a factory, since streamed bodies (generators) are consumed by each attempt.
+
+    :param method: HTTP method
+    :param url: URL
+    :param body: factory creating the request body
+    :param kwargs: further arguments of `requests.Session.request()`
+    :return: response
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            resp = get_session().request(method, url, data=None if body is None else body(), **kwargs)
+            if resp.status_code not in RETRY_STATUS_CODES or attempt == MAX_RETRIES:
+                return resp
+            resp.close()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+        print("KG request failed, retrying..")
+        time.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Compresses the streamed chunks (gzip).
+
+    :param chunks: chunks to be compressed
+    :return: generator of compressed chunks
+    """
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if len(compressed) > 0:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_file(open_file: Callable[[], BinaryIO]) -> Iterator[bytes]:
+    """
+    Streams the file in chunks (the file is closed after the last chunk).
+
+    :param open_file: opens the (binary) file to be streamed
+    :return: generator of chunks
+    """
+    with open_file() as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            yield chunk
+
+
+def sparql_update(update: str) -> requests.Response:
+    """
+    Performs the SPARQL update on the hosted KG.
+
+    :param update: SPARQL update
+    :return: response
+    """
+    return request_with_retries("POST", get_endpoint("update"), lambda: {"update": update})
+
+
+def upload_to_kg(
+        body: Callable[[], Iterable[bytes]], content_type: str = N_TRIPLES, compress: bool = KG_TRANSFER_COMPRESSION
+) -> requests.Response:
+    """
+    Uploads the streamed triples (or quads) to the hosted KG (chunked transfer encoding).
+
+    :param body: factory creating the stream of triples
+    :param content_type: RDF serialization of the body
+    :param compress: whether the body should be compressed on the wire (`Content-Encoding: gzip`)
+    :return: response
+    """
+    headers = {"Content-Type": content_type}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        return request_with_retries("POST", get_endpoint("data"), lambda: gzip_chunks(body()), headers=headers)
+    return request_with_retries("POST", get_endpoint("data"), body, headers=headers)
+
+
+def download_kg(url: str, kg_file: str) -> requests.Response:
+    """
+    Downloads the hosted KG (N-Triples) to file, streamed in chunks (compressed on the wire if supported by the
+    server, and on disk for `.nt.gz` files).
+
+    :param url: URL of the KG export
+    :param kg_file: KG file to be written
+    :return: response
+    """
+    with request_with_retries("GET", url, headers={"Accept": N_TRIPLES}, stream=True) as resp:
+        if resp.status_code == 200:
+            with create_kg_file(kg_file) as f:
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+    return resp
+
+
+def create_dataset(dataset_name: str) -> requests.Response:
+    """
+    Creates an (in-memory) dataset on the Fuseki server (admin API).
+
+    :param dataset_name: name of the dataset
+    :return: response
+    """
+    return request_with_retries(
+        "POST", config.FUSEKI_URL + "/$/datasets", lambda: {"dbName": dataset_name, "dbType": "mem"}
+    )
+
+
+def delete_dataset(dataset_name: str) -> requests.Response:
+    """
+    Deletes the dataset from the Fuseki server (admin API).
+
+    :param dataset_name: name of the dataset
+    :return: response
+    """
+    return request_with_retries("DELETE", config.FUSEKI_URL + "/$/datasets/" + dataset_name)
@@ -2,22 +2,81 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-import json
-from typing import List, Tuple
+import os
+from typing import List, Tuple, Iterable, Dict
 
+import numpy as np
 import pandas as pd
 from nesy_diag_smach.config import SIGNAL_SESSION_FILES
 from nesy_diag_smach.data_types.fault_context import FaultContext
 from nesy_diag_smach.data_types.sensor_data import SensorData
 from nesy_diag_smach.interfaces.data_accessor import DataAccessor
 
+from instance_io import ProblemInstance
+
+signal_stores: Dict[str, np.ndarray] = {}  # process-wide, memory-mapped signal datasets by path
+
+
+def get_signal_file(component: str) -> str:
+    """
+    Determines the signal dataset (UCR `.tsv` file) for the specified component.
+
+    :param component: component to determine the signal dataset for
+    :return: signal dataset file
+    """
+    # generally, each comp should have its own associated data, not all C0 (irrelevant for the eval)
+    return "res/" + SIGNAL_SESSION_FILES + "/" + "C0" + ".tsv"
+
+
+def convert_ucr_dataset(path: str, store_file: str) -> None:
+    """
+    Converts the UCR dataset (`.tsv`, label in col 0) into a NumPy array file (`.npy`, one row per signal). The file
+    is written atomically, i.e., concurrent workers never read partially written stores.
+
+    :param path: path to the UCR dataset
+    :param store_file: NumPy array file to be written
+    """
+    df = pd.read_csv(path, delimiter='\t', header=None, na_values=['-∞', '∞'])
+    tmp_file = store_file + "." + str(os.getpid()) + ".tmp.npy"
+    np.save(tmp_file, df.to_numpy(dtype=np.float64))
+    os.replace(tmp_file, store_file)
+
+
+def load_signal_store(path: str) -> np.ndarray:
+    """
+    Provides the memory-mapped signal store of the UCR dataset, which is converted once (and again when the dataset
+    changes) and then shared by all lookups of the process.
+
+    :param path: path to the UCR dataset
+    :return: signal store (rows: label + signal values)
+    """
+    if path not in signal_stores:
+        store_file = os.path.splitext(path)[0] + ".npy"
+        if not os.path.isfile(store_file) or os.path.getmtime(store_file) < os.path.getmtime(path):
+            convert_ucr_dataset(path, store_file)
+        signal_stores[path] = np.load(store_file, mmap_mode="r")
+    return signal_stores[path]
+
+
+def preload_signal_stores(components: Iterable[str]) -> None:
+    """
+    Loads the signal stores of the specified components, e.g., at the start of a worker.
+
+    :param components: components to load the signal stores for
+    """
+    for path in dict.fromkeys(get_signal_file(comp) for comp in components):
+        try:
+            load_signal_store(path)
+        except OSError as e:  # reported again when the signals are requested
+            print("failed to preload signal store", path, "--", e)
+
 
 class LocalDataAccessor(DataAccessor):
     """
     Implementation of the data accessor interface used for evaluation purposes.
     """
 
-    def __init__(self, instance: str) -> None:
+    def __init__(self, instance: ProblemInstance) -> None:
         """
         Inits the local data accessor.
 
@@ -31,10 +90,8 @@ class LocalDataAccessor(DataAccessor):
 
         :return: fault context data
         """
-        with open(self.instance, "r") as f:
-            problem_instance = json.load(f)
         # only take list of error codes as input, not more
-        input_error_codes = list(problem_instance["error_codes"].keys())
+        input_error_codes = list(self.instance.error_codes.keys())
         fault_context = FaultContext(input_error_codes, "1234567890ABCDEFGHJKLMNPRSTUVWXYZ")
         return fault_context
 
@@ -47,14 +104,11 @@ class LocalDataAccessor(DataAccessor):
         """
         signals = []
         # for each component, we need to check the ground truth of the instance - whether it should have an anomaly
-        with open(self.instance, "r") as f:
-            problem_instance = json.load(f)
         for comp in components:
             # we consider class 0 as anomaly
-            ground_truth_label = "0" if problem_instance["suspect_components"][comp][0] else "1"
-            # generally, each comp should have its own associated data, not all C0 (irrelevant for the eval)
-            path = "res/" + SIGNAL_SESSION_FILES + "/" + "C0" + ".tsv"
-            # parse one signal from tsv file
+            ground_truth_label = "0" if self.instance.is_anomaly(comp) else "1"
+            path = get_signal_file(comp)
+            # look up one signal in the signal store of the dataset
             _, values = self.read_ucr_recording(path, ground_truth_label)
             signals.append(SensorData(values, comp))
         return signals
@@ -70,10 +124,11 @@ class LocalDataAccessor(DataAccessor):
         """
         # generally, should be random from those with ground_truth_label
         sample_idx = 4 if ground_truth_label == "0" else 25
-        # dataframe containing all signals from the dataset + label in col 0
-        df = pd.read_csv(path, delimiter='\t', header=None, na_values=['-∞', '∞'])
-        selected_sample_label = int(df.iloc[sample_idx].to_list()[0])
-        selected_sample_values = df.iloc[sample_idx].to_list()[1:]
+        # all signals from the dataset + label in col 0
+        signal_store = load_signal_store(path)
+        selected_sample_label = int(signal_store[sample_idx, 0])
+        # copied out of the (read-only) memory-mapped signal store at the boundary
+        selected_sample_values = signal_store[sample_idx, 1:].tolist()
         return selected_sample_label, selected_sample_values
 
     def get_manual_judgement_for_component(self, component: str) -> bool:
@@ -2,20 +2,78 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-from typing import List
+import os
+import time
+from typing import List, Dict
 
+import numpy as np
 from PIL import Image
 from nesy_diag_smach.data_types.state_transition import StateTransition
 from nesy_diag_smach.interfaces.data_provider import DataProvider
 
+from config import TRACE_BUFFER_SIZE
+
 
 class LocalDataProvider(DataProvider):
     """
     Implementation of the data provider interface.
     """
 
-    def __init__(self):
-        pass
+    def __init__(self, trace_capacity: int = TRACE_BUFFER_SIZE) -> None:
+        """
+        Initializes the local data provider, which records the state transitions of the state machine in a ring buffer
+        (only the most recent `trace_capacity` transitions are kept).
+
+        :param trace_capacity: capacity of the ring buffer
+        """
+        self.trace_capacity = trace_capacity
+        self.timestamps = np.zeros(trace_capacity, dtype=np.int64)  # ns, `time.perf_counter_ns()`
+        self.prev_states = np.zeros(trace_capacity, dtype=np.int32)
+        self.curr_states = np.zeros(trace_capacity, dtype=np.int32)
+        self.transition_links = np.zeros(trace_capacity, dtype=np.int32)
+        self.name_ids: Dict[str, int] = {}  # interned state / transition names
+        self.num_of_transitions = 0
+        self.start_time = time.perf_counter_ns()
+
+    def get_name_id(self, name) -> int:
+        """
+        Interns the specified state / transition name.
+
+        :param name: state / transition name
+        :return: id of the name
+        """
+        name = str(name)
+        if name not in self.name_ids:
+            self.name_ids[name] = len(self.name_ids)
+        return self.name_ids[name]
+
+    def dump_trace(self, trace_file: str) -> None:
+        """
+        Writes the recorded state transitions to file in chronological order (columnar, compressed `.npz`):
+            - timestamp_ns, prev_state, curr_state, transition_link: one entry per transition (name ids)
+            - names: state / transition names by id
+            - start_ns, end_ns: start and end of the trace (the last state lasts until the end)
+            - num_of_dropped: number of transitions dropped by the ring buffer (oldest first)
+
+        :param trace_file: trace file
+        """
+        end_time = time.perf_counter_ns()
+        num_of_recorded = min(self.num_of_transitions, self.trace_capacity)
+        # oldest recorded transition first
+        order = (np.arange(num_of_recorded) + self.num_of_transitions - num_of_recorded) % self.trace_capacity
+        if os.path.dirname(trace_file) != "":
+            os.makedirs(os.path.dirname(trace_file), exist_ok=True)
+        np.savez_compressed(
+            trace_file,
+            timestamp_ns=self.timestamps[order],
+            prev_state=self.prev_states[order],
+            curr_state=self.curr_states[order],
+            transition_link=self.transition_links[order],
+            names=np.array(list(self.name_ids.keys()), dtype=str),
+            start_ns=np.int64(self.start_time),
+            end_ns=np.int64(end_time),
+            num_of_dropped=np.int64(self.num_of_transitions - num_of_recorded)
+        )
 
     def provide_causal_graph_visualizations(self, visualizations: List[Image.Image]) -> None:
         """
@@ -48,4 +106,9 @@ class LocalDataProvider(DataProvider):
 
         :param state_transition: state transition (prev state -- (transition link) --> current state)
         """
-        pass
+        idx = self.num_of_transitions % self.trace_capacity
+        self.timestamps[idx] = time.perf_counter_ns()
+        self.prev_states[idx] = self.get_name_id(state_transition.prev_state)
+        self.curr_states[idx] = self.get_name_id(state_transition.curr_state)
+        self.transition_links[idx] = self.get_name_id(state_transition.transition_link)
+        self.num_of_transitions += 1
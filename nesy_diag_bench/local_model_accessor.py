@@ -2,12 +2,54 @@
 # -*- coding: utf-8 -*-
 # @author Tim Bohne
 
-import json
-from typing import Union, Tuple, List, Dict
+import functools
+from typing import Union, Tuple, List, Dict, Iterable, TYPE_CHECKING
 
 from nesy_diag_smach.config import TRAINED_MODEL_POOL
 from nesy_diag_smach.interfaces.model_accessor import ModelAccessor
-from tensorflow import keras
+
+from config import MODEL_CACHE_SIZE
+from instance_io import ProblemInstance
+
+if TYPE_CHECKING:  # TensorFlow is only imported when a trained model is loaded (not for simulated models)
+    from tensorflow import keras
+
+
+def get_model_file(component: str) -> str:
+    """
+    Determines the trained model file for the specified component.
+
+    :param component: component to determine the model file for
+    :return: trained model file
+    """
+    # generally, there should be a model for each component (irrelevant for the eval)
+    return TRAINED_MODEL_POOL + "C0" + ".h5"
+
+
+@functools.lru_cache(maxsize=MODEL_CACHE_SIZE)
+def load_model(model_file: str) -> "keras.models.Model":
+    """
+    Loads the trained model from file -- process-wide LRU cache, i.e., each model is only deserialized once per
+    process instead of once per classified component (failed loads are not cached).
+
+    :param model_file: trained model file
+    :return: trained model
+    """
+    from tensorflow import keras
+    return keras.models.load_model(model_file)
+
+
+def prewarm_model_cache(components: Iterable[str]) -> None:
+    """
+    Loads the trained models of the specified components into the model cache, e.g., at the start of a worker.
+
+    :param components: components to load the trained models for
+    """
+    for model_file in dict.fromkeys(get_model_file(comp) for comp in components):
+        try:
+            load_model(model_file)
+        except OSError as e:  # reported again by the model accessor when the model is requested
+            print("failed to prewarm model cache with", model_file, "--", e)
 
 
 class LocalModelAccessor(ModelAccessor):
@@ -15,7 +57,7 @@ class LocalModelAccessor(ModelAccessor):
     Implementation of the model accessor interface for evaluation purposes.
     """
 
-    def __init__(self, instance: str, verbose: bool = False) -> None:
+    def __init__(self, instance: ProblemInstance, verbose: bool = False) -> None:
         """
         Initializes the local model accessor.
 
@@ -27,7 +69,7 @@ class LocalModelAccessor(ModelAccessor):
 
     def get_keras_univariate_ts_classification_model_by_component(
             self, component: str
-    ) -> Union[Tuple[keras.models.Model, Dict], None]:
+    ) -> Union[Tuple["keras.models.Model", Dict], None]:
         """
         Retrieves a trained model to classify signals of the specified component.
 
@@ -41,15 +83,14 @@ class LocalModelAccessor(ModelAccessor):
         :return: trained model and model meta info dictionary or `None` if unavailable
         """
         try:
-            # generally, there should be a model for each component (irrelevant for the eval)
-            trained_model_file = TRAINED_MODEL_POOL + "C0" + ".h5"
+            trained_model_file = get_model_file(component)
             if self.verbose:
                 print("loading trained model:", trained_model_file)
             model_meta_info = {
                 "normalization_method": "z_norm",
                 "model_id": "keras_univariate_ts_classification_model_001"
             }
-            return keras.models.load_model(trained_model_file), model_meta_info
+            return load_model(trained_model_file), model_meta_info
         except OSError as e:
             print("no trained model available for the signal (component) to be classified:", component)
             print("ERROR:", e)
@@ -61,6 +102,4 @@ class LocalModelAccessor(ModelAccessor):
         :param component: component to retrieve simulated models for
         :return: (simulated model accuracies, total number of simulated accuracies)
         """
-        with open(self.instance, "r") as f:
-            problem_instance = json.load(f)
-        return problem_instance["sim_accuracies"][component], len(problem_instance["sim_accuracies"])
+        return list(self.instance.sim_accuracies[component]), len(self.instance.sim_accuracies)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @author Tim Bohne
+
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+from instance_gen import (
+    create_arg_parser, generate_instance_set, get_instance_set_name_for_config, test_basic_functionality
+)
+
+PAIR_PARAMS = ["model_acc_bounds"]  # specified as [LB, UB] pairs
+
+
+def expand_grid(grid_spec: Dict) -> List[argparse.Namespace]:
+    """
+    Expands the grid specification into the configs of the instance generation.
+
+    The keys of the specification are the parameters of `instance_gen.py` (e.g., "anomaly_percentage"). List values
+    are grid axes, all other values are fixed for the entire sweep. Since the model accuracy bounds are specified in
+    pairs, they can be provided as "model_acc_bounds": a single pair (e.g., [0.9, 0.95]) is fixed, whereas a list of
+    pairs (e.g., [[0.9, 0.95], [0.95, 0.99]]) is a grid axis.
+    Unspecified parameters keep the defaults of `instance_gen.py`.
+
+    :param grid_spec: grid specification
+    :return: configs of the instance generation (cartesian product of all axes)
+    """
+    defaults = vars(create_arg_parser().parse_args([]))
+    axes = {}
+    fixed = {}
+    for param, value in grid_spec.items():
+        if param not in defaults and param != "model_acc_bounds":
+            raise ValueError("unknown parameter in grid specification: " + param)
+        is_axis = isinstance(value, list)
+        if param in PAIR_PARAMS:  # only a list of pairs is an axis
+            is_axis = is_axis and all(isinstance(pair, list) for pair in value)
+        if is_axis:
+            axes[param] = value
+        else:
+            fixed[param] = value
+    configs = []
+    for values in itertools.product(*axes.values()):
+        config = dict(defaults)
+        config.update(fixed)
+        config.update(zip(axes.keys(), values))
+        if "model_acc_bounds" in config:
+            config["model_acc_lb"], config["model_acc_ub"] = config.pop("model_acc_bounds")
+        configs.append(argparse.Namespace(**config))
+    return configs
+
+
+def test_expand_grid() -> None:
+    """
+    Tests the expansion of grid specifications, in particular fixed and varied model accuracy bounds.
+    """
+    configs = expand_grid({"anomaly_percentage": [0.1, 0.2], "model_acc_bounds": [0.9, 0.95]})
+    assert [(c.anomaly_percentage, c.model_acc_lb, c.model_acc_ub) for c in configs] == [
+        (0.1, 0.9, 0.95), (0.2, 0.9, 0.95)
+    ]
+    configs = expand_grid({"seed": 7, "model_acc_bounds": [[0.9, 0.95], [1.0, 1.0]]})
+    assert [(c.seed, c.model_acc_lb, c.model_acc_ub) for c in configs] == [(7, 0.9, 0.95), (7, 1.0, 1.0)]
+
+
+def read_manifest(manifest_file: str) -> Dict[str, Dict]:
+    """
+    Reads the manifest of completed instance sets.
+
+    :param manifest_file: manifest file (JSON lines)
+    :return: {instance set name: config}
+    """
+    completed = {}
+    if not os.path.isfile(manifest_file):
+        return completed
+    with open(manifest_file, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:  # incomplete last line of an interrupted sweep
+                continue
+            completed[entry["instance_set"]] = entry["config"]
+    return completed
+
+
+def record_in_manifest(manifest_file: str, config: argparse.Namespace) -> None:
+    """
+    Records the completion of the instance set generated for the specified config in the manifest.
+
+    :param manifest_file: manifest file (JSON lines)
+    :param config: config of the completed instance generation
+    """
+    entry = {"instance_set": get_instance_set_name_for_config(config), "config": vars(config)}
+    with open(manifest_file, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def run_sweep(configs: List[argparse.Namespace], manifest_file: str, jobs: int) -> int:
+    """
+    Generates the instance sets for all configs that are not yet recorded in the manifest, `jobs` sets at a time.
+
+    :param configs: configs of the instance generation
+    :param manifest_file: manifest file (JSON lines)
+    :param jobs: number of instance sets generated concurrently
+    :return: number of failed instance sets
+    """
+    completed = read_manifest(manifest_file)
+    pending = [c for c in configs if completed.get(get_instance_set_name_for_config(c)) != vars(c)]
+    print(len(configs) - len(pending), "of", len(configs), "instance sets already generated")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(generate_instance_set, config): config for config in pending}
+        for future in as_completed(futures):
+            instance_set = get_instance_set_name_for_config(futures[future])
+            try:
+                future.result()
+            except Exception as e:
+                print("failed to generate instance set", instance_set, "--", e)
+                failed += 1
+                continue
+            record_in_manifest(manifest_file, futures[future])
+            print("completed instance set", instance_set)
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the instance sets of an entire parameter grid.')
+    parser.add_argument('--grid', type=str, required=True)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--manifest', type=str, default="sweep_manifest.jsonl")
+    args = parser.parse_args()
+
+    with open(args.grid, "r") as f:
+        sweep_configs = expand_grid(json.load(f))
+    if args.jobs > 1 and any(c.extend_kg and not c.offline_kg for c in sweep_configs):
+        # all instance sets would share the single hosted KG
+        parser.error("extending the hosted KG requires --jobs 1 (or offline_kg)")
+
+    test_basic_functionality()
+    test_expand_grid()
+    num_failed = run_sweep(sweep_configs, args.manifest, args.jobs)
+    if num_failed > 0:
+        print(num_failed, "instance sets failed -- rerun to generate the missing sets")